@@ -0,0 +1,97 @@
+import time
+from typing import Optional
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
+from ..db.database import get_async_db
+from ..models.models import Document, User
+from ..services.cache import TTLCache
+from ..services.document_processor import DocumentProcessor
+from ..services.loan_processor import LoanProcessor
+from ..services.registry import services
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+# Roles that may read any customer's documents
+STAFF_ROLES = ("admin", "agent")
+
+# Verified tokens and the users they resolve to, so authenticated requests
+# skip the JWT decode and user lookup until the entry or the token expires
+principal_cache = TTLCache(settings.AUTH_CACHE_MAX_SIZE)
+
+def invalidate_user(email: str) -> int:
+    """Drop every cached principal for a user, e.g. after deactivation"""
+    return principal_cache.invalidate(lambda user: user.email == email)
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(
+            token, 
+            settings.JWT_SECRET_KEY, 
+            algorithms=[settings.JWT_ALGORITHM]
+        )
+        email: str = payload.get("sub")
+        if email is None:
+            raise credentials_exception
+    except JWTError:
+        raise credentials_exception
+        
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
+    if user is None or not user.is_active:
+        raise credentials_exception
+
+    # Never cache past the token's own expiry
+    expires_at = time.time() + settings.AUTH_CACHE_TTL_SECONDS
+    if payload.get("exp"):
+        expires_at = min(expires_at, payload["exp"])
+    principal_cache.set(token, user, expires_at)
+    # End the lookup's transaction so the connection is not held for the rest of the request
+    await db.commit()
+    return user
+
+def document_owner_id(current_user: User) -> Optional[int]:
+    """User whose documents the caller may read, or None for staff, who may read all of them"""
+    return None if current_user.role in STAFF_ROLES else current_user.id
+
+async def get_owned_document(
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Document:
+    document = await db.get(Document, document_id)
+    owner_id = document_owner_id(current_user)
+    # Other customers' documents are reported as missing rather than forbidden
+    if not document or (owner_id is not None and document.user_id != owner_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    return document
+
+def get_document_processor() -> DocumentProcessor:
+    return services.document_processor()
+
+def get_loan_processor() -> LoanProcessor:
+    try:
+        return services.loan_processor()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
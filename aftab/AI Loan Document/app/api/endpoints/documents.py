@@ -1,198 +1,439 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from typing import List
-import os
-from ...db.database import get_db
-from ...models.models import Document, LoanApplication
-from ...services.document_processor import DocumentProcessor
-from ...services.loan_processor import LoanProcessor
-from ...core.config import settings
-import uuid
-import logging
-
-router = APIRouter()
-logger = logging.getLogger(__name__)
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-
-@router.post("/upload/", status_code=status.HTTP_201_CREATED)
-async def upload_documents(
-    files: List[UploadFile] = File(...),
-    loan_application_id: int = None,
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-):
-    """
-    Upload multiple loan documents
-    """
-    try:
-        document_processor = DocumentProcessor()
-        results = []
-        
-        # Create upload directory if it doesn't exist
-        os.makedirs(settings.UPLOAD_FOLDER, exist_ok=True)
-        
-        for file in files:
-            # Generate unique filename
-            file_extension = os.path.splitext(file.filename)[1]
-            unique_filename = f"{uuid.uuid4()}{file_extension}"
-            file_path = os.path.join(settings.UPLOAD_FOLDER, unique_filename)
-            
-            # Save file temporarily
-            with open(file_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-            
-            # Process document
-            process_result = document_processor.process_document(
-                file_path=file_path,
-                object_name=unique_filename
-            )
-            
-            if process_result['status'] == 'success':
-                # Create document record
-                document = Document(
-                    filename=file.filename,
-                    file_path=process_result['storage_path'],
-                    file_type=file.content_type,
-                    file_size=len(content),
-                    status='processed',
-                    extracted_text=process_result['extraction_result']['text_content'],
-                    metadata=process_result['extraction_result']['metadata'],
-                    loan_application_id=loan_application_id
-                )
-                
-                db.add(document)
-                db.commit()
-                db.refresh(document)
-                
-                results.append({
-                    'document_id': document.id,
-                    'status': 'success',
-                    'filename': file.filename
-                })
-            else:
-                results.append({
-                    'filename': file.filename,
-                    'status': 'error',
-                    'error': process_result['error_message']
-                })
-            
-            # Clean up temporary file
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        
-        return {'results': results}
-        
-    except Exception as e:
-        logger.error(f"Document upload error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
-
-@router.post("/process/{loan_application_id}", status_code=status.HTTP_200_OK)
-async def process_loan_documents(
-    loan_application_id: int,
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-):
-    """
-    Process documents for a loan application
-    """
-    try:
-        # Get all documents for the loan application
-        documents = db.query(Document).filter(
-            Document.loan_application_id == loan_application_id
-        ).all()
-        
-        if not documents:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No documents found for this loan application"
-            )
-        
-        # Get loan application
-        loan_application = db.query(LoanApplication).filter(
-            LoanApplication.id == loan_application_id
-        ).first()
-        
-        if not loan_application:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Loan application not found"
-            )
-        
-        # Extract text from all documents
-        document_texts = []
-        for doc in documents:
-            if isinstance(doc.extracted_text, list):
-                for page in doc.extracted_text:
-                    document_texts.append(page.get('content', ''))
-            elif isinstance(doc.extracted_text, str):
-                document_texts.append(doc.extracted_text)
-        
-        # Process loan information
-        loan_processor = LoanProcessor()
-        processing_result = loan_processor.process_loan_application(document_texts)
-        
-        if processing_result['status'] == 'success':
-            # Update loan application with extracted data
-            loan_application.extracted_data = processing_result['data']
-            loan_application.processing_status = 'completed'
-            db.commit()
-            
-            return {
-                'status': 'success',
-                'loan_application_id': loan_application_id,
-                'extracted_data': processing_result['data']
-            }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=processing_result['error_message']
-            )
-            
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        logger.error(f"Loan document processing error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
-
-@router.get("/documents/{document_id}", status_code=status.HTTP_200_OK)
-async def get_document(
-    document_id: int,
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-):
-    """
-    Get document details by ID
-    """
-    document = db.query(Document).filter(Document.id == document_id).first()
-    
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found"
-        )
-    
-    return document
-
-@router.get("/loan-application/{loan_application_id}/documents", status_code=status.HTTP_200_OK)
-async def get_loan_application_documents(
-    loan_application_id: int,
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-):
-    """
-    Get all documents for a loan application
-    """
-    documents = db.query(Document).filter(
-        Document.loan_application_id == loan_application_id
-    ).all()
-    
-    return documents 
\ No newline at end of file
+import asyncio
+from fastapi import APIRouter, Depends, File, Query, UploadFile, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import os
+from ...db.database import get_async_db
+from ..deps import document_owner_id, get_current_user, get_loan_processor, get_owned_document
+from ...models.models import Document, DocumentPage, User
+from ...services.application_processing import process_application, ApplicationNotFoundError
+from ...services.document_processor import get_extraction_cache
+from ...services.events import EventChannel, format_sse, sse_stream
+from ...services.ingestion import process_uploaded_document
+from ...services.job_queue import job_queue, JobQueueFullError
+from ...services.search_index import get_search_index, make_snippet, query_terms
+from ...services.upload_storage import save_upload_stream, UploadRejectedError
+from ...services.loan_processor import LoanProcessor
+from ...services.rule_extractor import rule_extractor
+from ...core.config import settings
+from ...core.metrics import current_endpoint, stage_timer
+import uuid
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 200
+
+# Keep proxies from buffering event streams
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+# Streamed processing runs that are still going; referenced here so they are not garbage collected
+processing_tasks = set()
+
+# Columns returned by document listings; extracted text is only loaded on request
+DOCUMENT_SUMMARY_COLUMNS = [
+    Document.id,
+    Document.filename,
+    Document.file_type,
+    Document.file_size,
+    Document.status,
+    Document.error_message,
+    Document.confidence_score,
+    Document.loan_application_id,
+    Document.created_at,
+    Document.updated_at,
+]
+
+PAGE_COLUMNS = [
+    DocumentPage.document_id,
+    DocumentPage.page_number,
+    DocumentPage.content,
+    DocumentPage.ocr_used,
+    DocumentPage.char_count,
+]
+
+@router.post("/upload/", status_code=status.HTTP_202_ACCEPTED)
+async def upload_documents(
+    files: List[UploadFile] = File(...),
+    loan_application_id: int = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Upload multiple loan documents and queue them for processing
+    """
+    try:
+        results = []
+        accepted = []
+        
+        # Create upload directory if it doesn't exist
+        os.makedirs(settings.UPLOAD_FOLDER, exist_ok=True)
+        
+        for file in files:
+            # Generate unique filename
+            file_extension = os.path.splitext(file.filename)[1]
+            unique_filename = f"{uuid.uuid4()}{file_extension}"
+            file_path = os.path.join(settings.UPLOAD_FOLDER, unique_filename)
+            
+            # Copy the spooled upload to disk, where it stays until the worker has processed it
+            try:
+                upload = await save_upload_stream(file, file_path)
+            except UploadRejectedError as e:
+                results.append({
+                    'filename': file.filename,
+                    'status': 'error',
+                    'error': str(e)
+                })
+                continue
+            
+            result = {'filename': file.filename}
+            results.append(result)
+            accepted.append((result, unique_filename, {
+                'filename': file.filename,
+                'file_path': file_path,
+                'file_type': upload['mime_type'],
+                'file_size': upload['file_size'],
+                'content_hash': upload['content_hash'],
+                'status': 'uploaded',
+                'user_id': current_user.id,
+                'loan_application_id': loan_application_id
+            }))
+        
+        if not accepted:
+            return {'results': results}
+        
+        # Create all document records in one round-trip
+        document_ids = (await db.scalars(
+            insert(Document).returning(Document.id, sort_by_parameter_order=True),
+            [row for _, _, row in accepted]
+        )).all()
+        with stage_timer("db_commit"):
+            await db.commit()
+        
+        # Queue documents for processing
+        failed_ids = []
+        for (result, unique_filename, row), document_id in zip(accepted, document_ids):
+            result['document_id'] = document_id
+            try:
+                job = job_queue.submit(
+                    process_uploaded_document,
+                    document_id=document_id,
+                    file_path=row['file_path'],
+                    object_name=unique_filename,
+                    content_hash=row['content_hash'],
+                    endpoint=current_endpoint.get()
+                )
+            except JobQueueFullError as e:
+                failed_ids.append(document_id)
+                os.remove(row['file_path'])
+                result.update(status='error', error=str(e))
+                continue
+            
+            result.update(job_id=job.id, status=job.status)
+        
+        if failed_ids:
+            await db.execute(
+                update(Document).where(Document.id.in_(failed_ids)).values(status='failed')
+            )
+            await db.commit()
+        
+        return {'results': results}
+        
+    except Exception as e:
+        logger.error(f"Document upload error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+# Declared before /jobs/{job_id} so "stats" is not taken for a job id
+@router.get("/jobs/stats", status_code=status.HTTP_200_OK)
+async def get_job_queue_stats(current_user: User = Depends(get_current_user)):
+    """
+    Get processing worker count, queue depth and job counts by status
+    """
+    return job_queue.stats()
+
+@router.get("/jobs/{job_id}", status_code=status.HTTP_200_OK)
+async def get_job_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get processing status for an uploaded document
+    """
+    job = job_queue.get(job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream an uploaded document's progress and per-page events as server-sent events
+    """
+    job = job_queue.get(job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    # Subscribe before taking the snapshot so no event falls between the two
+    subscription = job.events.subscribe()
+    
+    async def event_stream():
+        yield format_sse('status', job.to_dict())
+        async for chunk in sse_stream(subscription):
+            yield chunk
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/process/{loan_application_id}", status_code=status.HTTP_200_OK)
+async def process_loan_documents(
+    loan_application_id: int,
+    force: bool = Query(False, description="Re-extract every document, ignoring stored results"),
+    loan_processor: LoanProcessor = Depends(get_loan_processor),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Process documents for a loan application, extracting only new or changed documents
+    """
+    try:
+        # No request-scoped session: process_application holds a connection only to read and to write
+        processing_result = await process_application(loan_processor, loan_application_id, force=force)
+        
+        if processing_result['status'] == 'success':
+            return {
+                'status': 'success',
+                'loan_application_id': loan_application_id,
+                'extracted_data': processing_result['data'],
+                'extracted_documents': processing_result['extracted_documents'],
+                'reused_documents': processing_result['reused_documents'],
+                'skipped_documents': processing_result['skipped_documents'],
+                'failed_documents': processing_result['failed_documents']
+            }
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=processing_result['error_message']
+            )
+            
+    except ApplicationNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Loan document processing error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/process/{loan_application_id}/stream")
+async def stream_loan_processing(
+    loan_application_id: int,
+    force: bool = Query(False, description="Re-extract every document, ignoring stored results"),
+    loan_processor: LoanProcessor = Depends(get_loan_processor),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Process documents for a loan application, streaming per-document progress as
+    server-sent events and ending with a "result" event holding the LoanInfo
+    """
+    channel = EventChannel()
+    subscription = channel.subscribe()
+    
+    async def run():
+        try:
+            # Not tied to the request, so processing finishes and is saved even if the client disconnects
+            processing_result = await process_application(
+                loan_processor, loan_application_id, force=force, on_event=channel.publish
+            )
+            if processing_result['status'] == 'success':
+                channel.publish('result', {
+                    'status': 'success',
+                    'loan_application_id': loan_application_id,
+                    'extracted_data': processing_result['data'],
+                    'extracted_documents': processing_result['extracted_documents'],
+                    'reused_documents': processing_result['reused_documents'],
+                    'skipped_documents': processing_result['skipped_documents'],
+                    'failed_documents': processing_result['failed_documents']
+                })
+            else:
+                channel.publish('error', {
+                    'status_code': status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    'detail': processing_result['error_message']
+                })
+        except ApplicationNotFoundError as e:
+            channel.publish('error', {'status_code': status.HTTP_404_NOT_FOUND, 'detail': str(e)})
+        except Exception as e:
+            logger.error(f"Loan document processing error: {str(e)}")
+            channel.publish('error', {'status_code': status.HTTP_500_INTERNAL_SERVER_ERROR, 'detail': str(e)})
+        finally:
+            channel.close()
+    
+    task = asyncio.create_task(run())
+    processing_tasks.add(task)
+    task.add_done_callback(processing_tasks.discard)
+    
+    return StreamingResponse(sse_stream(subscription), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/documents/{document_id}", status_code=status.HTTP_200_OK)
+async def get_document(document: Document = Depends(get_owned_document)):
+    """
+    Get document details by ID
+    """
+    return document
+
+@router.get("/documents/{document_id}/pages", status_code=status.HTTP_200_OK)
+async def get_document_pages(
+    document_id: int,
+    start: int = Query(1, ge=1, description="First page number to return"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    document: Document = Depends(get_owned_document)
+):
+    """
+    Get a range of extracted pages for a document
+    """
+    pages = (await db.execute(
+        select(*PAGE_COLUMNS)
+        .where(
+            DocumentPage.document_id == document_id,
+            DocumentPage.page_number >= start
+        )
+        .order_by(DocumentPage.page_number)
+        .limit(limit)
+    )).mappings().all()
+    
+    return {'document_id': document_id, 'pages': [dict(page) for page in pages]}
+
+@router.get("/loan-application/{loan_application_id}/documents", status_code=status.HTTP_200_OK)
+async def get_loan_application_documents(
+    loan_application_id: int,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, description="Last document ID of the previous page"),
+    include_text: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get documents for a loan application, one page at a time
+    """
+    columns = DOCUMENT_SUMMARY_COLUMNS
+    if include_text:
+        columns = columns + [Document.doc_metadata]
+    
+    query = (
+        select(*columns)
+        .where(Document.loan_application_id == loan_application_id)
+        .order_by(Document.id)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        query = query.where(Document.id > cursor)
+    # Customers only see their own documents, even in an application they can name
+    owner_id = document_owner_id(current_user)
+    if owner_id is not None:
+        query = query.where(Document.user_id == owner_id)
+    
+    rows = (await db.execute(query)).mappings().all()
+    has_more = len(rows) > limit
+    items = [dict(row) for row in rows[:limit]]
+    
+    if include_text and items:
+        pages_by_document = {item['id']: [] for item in items}
+        pages = await db.execute(
+            select(*PAGE_COLUMNS)
+            .where(DocumentPage.document_id.in_(pages_by_document))
+            .order_by(DocumentPage.document_id, DocumentPage.page_number)
+        )
+        for page in pages.mappings():
+            pages_by_document[page['document_id']].append(dict(page))
+        for item in items:
+            item['pages'] = pages_by_document[item['id']]
+    
+    return {
+        'items': items,
+        'next_cursor': items[-1]['id'] if has_more else None
+    }
+
+@router.get("/search", status_code=status.HTTP_200_OK)
+async def search_documents(
+    q: str = Query(..., min_length=1, description="Words to search for in extracted text"),
+    loan_application_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Full-text search over extracted document pages, ranked by relevance
+    """
+    if not query_terms(q):
+        return {'query': q, 'results': [], 'next_offset': None}
+    
+    search_index = get_search_index()
+    hits = (await db.execute(
+        search_index.search_statement(q, limit + 1, offset, loan_application_id, document_owner_id(current_user))
+    )).mappings().all()
+    has_more = len(hits) > limit
+    hits = hits[:limit]
+    
+    # Snippets are cut from the matching pages only
+    page_ids = [hit['page_id'] for hit in hits]
+    contents = dict((await db.execute(
+        select(DocumentPage.id, DocumentPage.content).where(DocumentPage.id.in_(page_ids))
+    )).all()) if page_ids else {}
+    
+    results = [
+        {
+            'document_id': hit['document_id'],
+            'filename': hit['filename'],
+            'loan_application_id': hit['loan_application_id'],
+            'page_number': hit['page_number'],
+            'rank': hit['rank'],
+            'snippet': make_snippet(contents.get(hit['page_id'], ''), q)
+        }
+        for hit in hits
+    ]
+    
+    return {
+        'query': q,
+        'results': results,
+        'next_offset': offset + limit if has_more else None
+    }
+
+@router.get("/cache/stats", status_code=status.HTTP_200_OK)
+async def get_extraction_cache_stats(current_user: User = Depends(get_current_user)):
+    """
+    Get extraction cache hit/miss counts
+    """
+    cache = get_extraction_cache()
+    if cache is None:
+        return {'enabled': False}
+    
+    return {'enabled': True, **cache.stats()}
+
+@router.get("/fast-path/stats", status_code=status.HTTP_200_OK)
+async def get_fast_path_stats(current_user: User = Depends(get_current_user)):
+    """
+    Get how often the rule-based extractor answered without calling the LLM
+    """
+    return {'enabled': settings.FAST_PATH_ENABLED, **rule_extractor.stats()}
\ No newline at end of file
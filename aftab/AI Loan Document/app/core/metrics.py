@@ -0,0 +1,91 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Tuple
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from starlette.routing import Match
+
+# Route template of the request being served; background jobs carry over the endpoint that queued them
+current_endpoint: ContextVar[str] = ContextVar("metrics_endpoint", default="background")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["endpoint", "method", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_duration_seconds",
+    "Latency of document pipeline stages (per page for rasterize and ocr)",
+    ["stage", "endpoint", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+
+STAGE_TOTAL = Counter(
+    "pipeline_stage_total",
+    "Document pipeline stage runs",
+    ["stage", "endpoint", "outcome"]
+)
+
+LLM_PROMPT_CHARS = Histogram(
+    "llm_prompt_characters",
+    "Size of the document text sent to the LLM",
+    ["endpoint", "outcome"],
+    buckets=(1000, 4000, 8000, 16000, 32000, 64000, 128000)
+)
+
+FAST_PATH_TOTAL = Counter(
+    "extraction_fast_path_total",
+    "Extractions answered by the rule-based fast path (hit) or passed on to the LLM (miss)",
+    ["endpoint", "outcome"]
+)
+
+def observe_stage(stage: str, seconds: float, outcome: str = "success", count: int = 1):
+    """Record count runs of a stage that took seconds each"""
+    endpoint = current_endpoint.get()
+    histogram = STAGE_SECONDS.labels(stage, endpoint, outcome)
+    for _ in range(count):
+        histogram.observe(seconds)
+    STAGE_TOTAL.labels(stage, endpoint, outcome).inc(count)
+
+@contextmanager
+def stage_timer(stage: str, count: int = 1):
+    """Time a block with the monotonic clock, recording outcome=error if it raises.
+
+    With count > 1 the block covers that many items (e.g. pages) and each is
+    recorded with an equal share of the elapsed time.
+    """
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        observe_stage(stage, elapsed / max(count, 1), outcome, count)
+
+def observe_prompt(characters: int, outcome: str):
+    LLM_PROMPT_CHARS.labels(current_endpoint.get(), outcome).observe(characters)
+
+def observe_fast_path(hit: bool):
+    FAST_PATH_TOTAL.labels(current_endpoint.get(), "hit" if hit else "miss").inc()
+
+def observe_request(endpoint: str, method: str, status_code: int, seconds: float):
+    REQUEST_SECONDS.labels(endpoint, method, f"{status_code // 100}xx").observe(seconds)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text exposition format, with its content type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def route_template(request) -> Optional[str]:
+    """Path template of the route a request will hit, so ids do not become label values"""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", None)
+    return None
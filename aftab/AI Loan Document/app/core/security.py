@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+from passlib.context import CryptContext
+from .config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PasswordHasherBusyError(Exception):
+    """Raised when too many hash/verify calls are already waiting"""
+
+class PasswordHasher:
+    """bcrypt hashing and verification on a bounded thread pool, off the event loop.
+
+    Hashes whose cost differs from BCRYPT_ROUNDS are reported by
+    verify_and_update so they can be rehashed transparently on login.
+    """
+
+    def __init__(self, rounds: int, max_workers: int, max_queue: int):
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds
+        )
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+
+    async def _run(self, func: Callable, *args):
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusyError("Too many concurrent password operations")
+            self.pending += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password, returning a replacement hash when the stored cost is outdated"""
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'in_flight': min(self.pending, self.max_workers),
+                'queue_depth': max(0, self.pending - self.max_workers),
+                'max_queue': self.max_queue,
+                'completed': self.completed,
+                'rejected': self.rejected
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    max_workers=settings.PASSWORD_HASH_MAX_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
@@ -0,0 +1,41 @@
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from ..models.models import DocumentPage
+from ..services.search_index import get_search_index
+from ..core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+def build_search_index(batch_size: int = 500):
+    """Create the full-text search index and add any pages not yet indexed"""
+    engine = create_engine(settings.DATABASE_URL)
+    search_index = get_search_index()
+
+    with engine.begin() as conn:
+        search_index.ensure_schema(conn)
+
+    indexed = 0
+    last_id = 0
+    with Session(engine) as db:
+        while True:
+            page_ids = db.scalars(search_index.unindexed_statement(last_id, batch_size)).all()
+            if not page_ids:
+                break
+
+            # Content is read through the model so compressed pages are indexed as text
+            pages = db.execute(
+                select(DocumentPage.id, DocumentPage.content).where(DocumentPage.id.in_(page_ids))
+            ).all()
+            search_index.index_pages(db, [(page.id, page.content) for page in pages])
+            db.commit()
+
+            indexed += len(pages)
+            last_id = page_ids[-1]
+            logger.info(f"Indexed {indexed} document pages for search")
+
+    logger.info(f"Search index complete: {indexed} document pages indexed")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build_search_index()
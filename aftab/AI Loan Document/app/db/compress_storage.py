@@ -0,0 +1,141 @@
+import argparse
+from typing import Dict
+from sqlalchemy import Column, JSON, LargeBinary, create_engine, insert, inspect, text
+from sqlalchemy.engine import Engine
+from ..models.base import Base
+from ..models.models import CompressionDictionary, Document, DocumentPage, LoanApplication
+from ..models.types import CompressedJSON
+from ..services.compression import compress_text, decompress_text, dictionary_store, train_dictionary
+from ..core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns stored compressed when COMPRESSED_STORAGE_ENABLED is on
+COMPRESSED_COLUMNS = [
+    Document.__table__.c.extracted_text,
+    DocumentPage.__table__.c.content,
+    LoanApplication.__table__.c.extracted_data,
+]
+
+def column_is_binary(engine: Engine, column: Column) -> bool:
+    """Whether the column is currently binary in the database, whatever the models declare"""
+    for db_column in inspect(engine).get_columns(column.table.name):
+        if db_column['name'] == column.name:
+            return isinstance(db_column['type'], LargeBinary)
+    raise LookupError(f"Column {column.table.name}.{column.name} not found")
+
+def alter_column_type(engine: Engine, column: Column, to_binary: bool):
+    """Switch a PostgreSQL column between bytea and its plain type, keeping the UTF-8 text"""
+    table, name = column.table.name, column.name
+    if to_binary:
+        statement = f"ALTER TABLE {table} ALTER COLUMN {name} TYPE bytea USING convert_to({name}::text, 'UTF8')"
+    else:
+        target = "json" if isinstance(column.type, (JSON, CompressedJSON)) else "text"
+        statement = f"ALTER TABLE {table} ALTER COLUMN {name} TYPE {target} USING convert_from({name}, 'UTF8')::{target}"
+    with engine.begin() as conn:
+        conn.execute(text(statement))
+    logger.info(f"Changed {table}.{name} to {'bytea' if to_binary else 'plain'} storage")
+
+def stored_size(value) -> int:
+    return len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+
+def convert_column(engine: Engine, column: Column, compress: bool, batch_size: int) -> Dict[str, int]:
+    """Rewrite every value of a column in its compressed or plain stored form, in id order"""
+    table, name = column.table.name, column.name
+    sqlite = engine.dialect.name == "sqlite"
+    binary = column_is_binary(engine, column)
+    stats = {'rows': 0, 'converted': 0, 'bytes_before': 0, 'bytes_after': 0}
+
+    if not sqlite and not binary:
+        if not compress:
+            return stats  # already plain
+        alter_column_type(engine, column, to_binary=True)
+        binary = True
+
+    select_batch = text(
+        f"SELECT id, {name} FROM {table} WHERE id > :last_id AND {name} IS NOT NULL ORDER BY id LIMIT :limit"
+    )
+    update_value = text(f"UPDATE {table} SET {name} = :value WHERE id = :id")
+
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(select_batch, {'last_id': last_id, 'limit': batch_size}).all()
+            if not rows:
+                break
+
+            updates = []
+            for row_id, stored in rows:
+                stored = bytes(stored) if isinstance(stored, memoryview) else stored
+                value = decompress_text(stored)
+                if compress:
+                    converted = compress_text(value)
+                else:
+                    # Plain text goes back into bytea as UTF-8 until the column type is restored
+                    converted = value.encode("utf-8") if binary and not sqlite else value
+                stats['rows'] += 1
+                stats['bytes_before'] += stored_size(stored)
+                stats['bytes_after'] += stored_size(converted)
+                if converted != stored:
+                    updates.append({'id': row_id, 'value': converted})
+
+            if updates:
+                conn.execute(update_value, updates)
+            stats['converted'] += len(updates)
+            last_id = rows[-1][0]
+        logger.info(f"{table}.{name}: {stats['rows']} rows scanned, {stats['converted']} rewritten")
+
+    if not compress and binary and not sqlite:
+        alter_column_type(engine, column, to_binary=False)
+    return stats
+
+def train_storage_dictionary(engine: Engine, sample_size: int, dictionary_size: int):
+    """Train a dictionary on a random sample of page text and make it the one new writes use"""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT content FROM document_pages ORDER BY random() LIMIT :limit"),
+            {'limit': sample_size}
+        ).all()
+    samples = [decompress_text(row[0]) for row in rows]
+    if len(samples) < 10:
+        logger.warning(f"Not enough pages to train a dictionary ({len(samples)}); compressing without one")
+        return
+
+    dictionary = train_dictionary(samples, settings.COMPRESSION_CODEC, dictionary_size)
+    with engine.begin() as conn:
+        conn.execute(insert(CompressionDictionary).values(codec=settings.COMPRESSION_CODEC, data=dictionary))
+    dictionary_store.load()
+    logger.info(f"Trained a {len(dictionary)} byte {settings.COMPRESSION_CODEC} dictionary on {len(samples)} pages")
+
+def compress_storage(train: bool = False, sample_size: int = 2000, dictionary_size: int = 32 * 1024, batch_size: int = 500):
+    """Convert stored page text and extracted data to match COMPRESSED_STORAGE_ENABLED.
+
+    When enabled, values are compressed (and recompressed when a newer
+    dictionary exists); when disabled, they are restored to plain columns.
+    Safe to re-run: values already in the wanted form are left alone.
+    """
+    engine = create_engine(settings.DATABASE_URL)
+    compress = settings.COMPRESSED_STORAGE_ENABLED
+    Base.metadata.create_all(bind=engine, tables=[CompressionDictionary.__table__])
+
+    if compress and train:
+        train_storage_dictionary(engine, sample_size, dictionary_size)
+
+    for column in COMPRESSED_COLUMNS:
+        stats = convert_column(engine, column, compress, batch_size)
+        ratio = stats['bytes_after'] / stats['bytes_before'] if stats['bytes_before'] else 1.0
+        logger.info(
+            f"{column.table.name}.{column.name}: {stats['converted']} of {stats['rows']} rows rewritten, "
+            f"{stats['bytes_before']} -> {stats['bytes_after']} bytes ({ratio:.0%})"
+        )
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=compress_storage.__doc__)
+    parser.add_argument("--train", action="store_true", help="train a new dictionary on the stored pages first")
+    parser.add_argument("--sample-size", type=int, default=2000, help="pages sampled for training")
+    parser.add_argument("--dictionary-size", type=int, default=32 * 1024, help="bytes; zlib uses at most 32 KiB")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    compress_storage(args.train, args.sample_size, args.dictionary_size, args.batch_size)
@@ -0,0 +1,116 @@
+import ast
+import json
+from typing import Dict, List
+from sqlalchemy import Column, create_engine, exists, insert, inspect, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from ..models.base import Base
+from ..models.models import Document, DocumentPage, LoanApplication, AuditLog
+from ..core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns added to tables that already exist in older databases; create_all never alters a table
+ADDED_COLUMNS: List[Column] = [
+    Document.__table__.c.content_hash,
+    Document.__table__.c.extracted_data,
+    Document.__table__.c.extraction_fingerprint,
+    Document.__table__.c.error_message,
+]
+
+def add_missing_columns(engine: Engine):
+    """Add any of ADDED_COLUMNS an existing table lacks, as nullable columns"""
+    inspector = inspect(engine)
+    for column in ADDED_COLUMNS:
+        existing = {db_column['name'] for db_column in inspector.get_columns(column.table.name)}
+        if column.name in existing:
+            continue
+        column_type = column.type.compile(dialect=engine.dialect)
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {column.table.name} ADD COLUMN {column.name} {column_type}"))
+        logger.info(f"Added column {column.table.name}.{column.name}")
+
+def parse_legacy_pages(extracted_text) -> List[Dict[str, any]]:
+    """Turn a legacy Document.extracted_text value into page dicts.
+
+    Older rows hold either the page list written by the upload path (as JSON
+    or its Python repr, depending on the driver) or a single plain string.
+    """
+    pages = extracted_text
+    if isinstance(pages, str):
+        try:
+            pages = json.loads(pages)
+        except ValueError:
+            try:
+                pages = ast.literal_eval(pages)
+            except (ValueError, SyntaxError):
+                pages = [{'page_number': 1, 'content': extracted_text}]
+
+    if not isinstance(pages, list):
+        pages = [{'page_number': 1, 'content': str(pages)}]
+
+    return [
+        {
+            'page_number': page.get('page_number', index + 1),
+            'content': page.get('content', ''),
+            'ocr_used': page.get('ocr_used', False)
+        }
+        for index, page in enumerate(pages)
+        if isinstance(page, dict) and page.get('content')
+    ]
+
+def migrate_document_pages(batch_size: int = 100):
+    """Bring an older database up to the current schema, then move legacy extracted_text into document_pages"""
+    engine = create_engine(settings.DATABASE_URL)
+
+    # New columns and table, then indexes added to existing tables (some cover the new columns)
+    add_missing_columns(engine)
+    Base.metadata.create_all(bind=engine, tables=[DocumentPage.__table__])
+    for model in (Document, LoanApplication, AuditLog):
+        for index in model.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    migrated = 0
+    last_id = 0
+    with Session(engine) as db:
+        while True:
+            # Only the columns every schema version has, so older databases can be read
+            documents = db.execute(
+                select(Document.id, Document.extracted_text)
+                .where(
+                    Document.id > last_id,
+                    Document.extracted_text.isnot(None),
+                    ~exists().where(DocumentPage.document_id == Document.id)
+                )
+                .order_by(Document.id)
+                .limit(batch_size)
+            ).all()
+            if not documents:
+                break
+
+            for document in documents:
+                pages = parse_legacy_pages(document.extracted_text)
+                if pages:
+                    db.execute(insert(DocumentPage), [
+                        {
+                            'document_id': document.id,
+                            'page_number': page['page_number'],
+                            'content': page['content'],
+                            'ocr_used': page['ocr_used'],
+                            'char_count': len(page['content'])
+                        }
+                        for page in pages
+                    ])
+                db.execute(update(Document).where(Document.id == document.id).values(extracted_text=None))
+                migrated += 1
+
+            last_id = documents[-1].id
+            db.commit()
+            logger.info(f"Migrated {migrated} documents to document_pages")
+
+    logger.info(f"Document page migration complete: {migrated} documents migrated")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    migrate_document_pages()
@@ -1,65 +1,109 @@
-from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from .api.endpoints import documents, auth
-from .core.config import settings
-import logging
-import time
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    version=settings.VERSION
-)
-
-# CORS middleware configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Request timing middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
-
-# Include routers
-app.include_router(
-    auth.router,
-    prefix="/api/v1/auth",
-    tags=["authentication"]
-)
-
-app.include_router(
-    documents.router,
-    prefix="/api/v1/documents",
-    tags=["documents"]
-)
-
-# Health check endpoint
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
-
-# Error handlers
-@app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Global exception handler caught: {exc}")
-    return JSONResponse(
-        status_code=500,
-        content={"detail": "Internal server error"}
-    )
-
-if __name__ == "__main__":
-    import uvicorn
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from .api.endpoints import documents, auth
+from .core.config import settings
+from .core.metrics import current_endpoint, observe_request, render_metrics, route_template
+from .core.security import password_hasher
+from .db.database import async_engine
+from .services.compression import dictionary_store
+from .services.job_queue import job_queue
+from .services.registry import services
+import logging
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Services are otherwise built on first use, so auth-only workers start without the PDF and LLM stacks
+    if settings.WARMUP_ON_STARTUP:
+        await run_in_threadpool(services.warm_up)
+    if settings.COMPRESSED_STORAGE_ENABLED:
+        # Loaded here rather than by the first request that reads a compressed value
+        await run_in_threadpool(dictionary_store.load)
+    job_queue.start()
+    yield
+    job_queue.shutdown()
+    services.close()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    version=settings.VERSION,
+    lifespan=lifespan
+)
+
+# CORS middleware configuration
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # In production, replace with specific origins
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Request timing middleware
+@app.middleware("http")
+async def add_process_time_header(request: Request, call_next):
+    start_time = time.perf_counter()
+    endpoint = route_template(request) or "unmatched"
+    current_endpoint.set(endpoint)
+    response = await call_next(request)
+    process_time = time.perf_counter() - start_time
+    response.headers["X-Process-Time"] = str(process_time)
+    observe_request(endpoint, request.method, response.status_code, process_time)
+    return response
+
+# Refuse oversized bodies from their Content-Length, before Starlette receives and spools them
+@app.middleware("http")
+async def reject_oversized_requests(request: Request, call_next):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_REQUEST_SIZE:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body exceeds {settings.MAX_UPLOAD_REQUEST_SIZE} bytes"}
+        )
+    return await call_next(request)
+
+# Include routers
+app.include_router(
+    auth.router,
+    prefix="/api/v1/auth",
+    tags=["authentication"]
+)
+
+app.include_router(
+    documents.router,
+    prefix="/api/v1/documents",
+    tags=["documents"]
+)
+
+# Health check endpoint
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy"}
+
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+# Error handlers
+@app.exception_handler(Exception)
+async def global_exception_handler(request: Request, exc: Exception):
+    logger.error(f"Global exception handler caught: {exc}")
+    return JSONResponse(
+        status_code=500,
+        content={"detail": "Internal server error"}
+    )
+
+if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -1,57 +1,99 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, Text, JSON
-from sqlalchemy.orm import relationship
-from .base import BaseModel, Base
-
-class User(BaseModel):
-    __tablename__ = "users"
-
-    email = Column(String, unique=True, index=True)
-    hashed_password = Column(String)
-    full_name = Column(String)
-    role = Column(String)  # admin, agent, customer
-    is_active = Column(Boolean, default=True)
-
-    documents = relationship("Document", back_populates="user")
-    loan_applications = relationship("LoanApplication", back_populates="user")
-
-class Document(BaseModel):
-    __tablename__ = "documents"
-
-    filename = Column(String)
-    file_path = Column(String)  # S3 path or local path
-    file_type = Column(String)
-    file_size = Column(Integer)
-    status = Column(String)  # uploaded, processed, failed
-    extracted_text = Column(Text, nullable=True)
-    metadata = Column(JSON, nullable=True)
-    confidence_score = Column(Float, nullable=True)
-    
-    user_id = Column(Integer, ForeignKey("users.id"))
-    loan_application_id = Column(Integer, ForeignKey("loan_applications.id"))
-    
-    user = relationship("User", back_populates="documents")
-    loan_application = relationship("LoanApplication", back_populates="documents")
-
-class LoanApplication(BaseModel):
-    __tablename__ = "loan_applications"
-
-    loan_amount = Column(Float)
-    interest_rate = Column(Float)
-    tenure_months = Column(Integer)
-    status = Column(String)  # pending, approved, rejected
-    processing_status = Column(String)  # new, processing, completed
-    extracted_data = Column(JSON)
-    
-    user_id = Column(Integer, ForeignKey("users.id"))
-    user = relationship("User", back_populates="loan_applications")
-    documents = relationship("Document", back_populates="loan_application")
-
-class AuditLog(BaseModel):
-    __tablename__ = "audit_logs"
-
-    action = Column(String)
-    entity_type = Column(String)
-    entity_id = Column(Integer)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    details = Column(JSON)
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Boolean, Text, JSON, Index, LargeBinary, UniqueConstraint
+from sqlalchemy.orm import relationship
+from .base import BaseModel, Base
+from .types import CompressedJSON, CompressedText
+from ..core.config import settings
+
+# Opt-in: existing rows must be converted with `python -m app.db.compress_storage`
+# whenever COMPRESSED_STORAGE_ENABLED is switched on or off
+LARGE_TEXT = CompressedText if settings.COMPRESSED_STORAGE_ENABLED else Text
+LARGE_JSON = CompressedJSON if settings.COMPRESSED_STORAGE_ENABLED else JSON
+
+class User(BaseModel):
+    __tablename__ = "users"
+
+    email = Column(String, unique=True, index=True)
+    hashed_password = Column(String)
+    full_name = Column(String)
+    role = Column(String)  # admin, agent, customer
+    is_active = Column(Boolean, default=True)
+
+    documents = relationship("Document", back_populates="user")
+    loan_applications = relationship("LoanApplication", back_populates="user")
+
+class Document(BaseModel):
+    __tablename__ = "documents"
+    __table_args__ = (
+        # Serves both filtering by application and keyset pagination by id
+        Index("ix_documents_loan_application_id_id", "loan_application_id", "id"),
+    )
+
+    filename = Column(String)
+    file_path = Column(String)  # S3 path or local path
+    file_type = Column(String)
+    file_size = Column(Integer)
+    content_hash = Column(String, nullable=True, index=True)  # SHA-256 of the uploaded bytes
+    status = Column(String, index=True)  # uploaded, processing, processed, failed
+    error_message = Column(Text, nullable=True)  # why processing last failed
+    extracted_text = Column(LARGE_TEXT, nullable=True)  # legacy, superseded by pages
+    doc_metadata = Column("metadata", JSON, nullable=True)  # "metadata" is reserved by declarative
+    confidence_score = Column(Float, nullable=True)
+    extracted_data = Column(JSON, nullable=True)  # loan fields found in this document alone
+    extraction_fingerprint = Column(String, nullable=True)  # inputs extracted_data was computed from
+    
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    loan_application_id = Column(Integer, ForeignKey("loan_applications.id"))
+    
+    user = relationship("User", back_populates="documents")
+    loan_application = relationship("LoanApplication", back_populates="documents")
+    pages = relationship(
+        "DocumentPage",
+        back_populates="document",
+        order_by="DocumentPage.page_number",
+        cascade="all, delete-orphan"
+    )
+
+class DocumentPage(BaseModel):
+    __tablename__ = "document_pages"
+    __table_args__ = (
+        # Leading document_id column also serves as the foreign key index
+        UniqueConstraint("document_id", "page_number", name="uq_document_pages_document_id_page_number"),
+    )
+
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    page_number = Column(Integer, nullable=False)
+    content = Column(LARGE_TEXT, nullable=False)
+    ocr_used = Column(Boolean, default=False)
+    char_count = Column(Integer)
+
+    document = relationship("Document", back_populates="pages")
+
+class LoanApplication(BaseModel):
+    __tablename__ = "loan_applications"
+
+    loan_amount = Column(Float)
+    interest_rate = Column(Float)
+    tenure_months = Column(Integer)
+    status = Column(String, index=True)  # pending, approved, rejected
+    processing_status = Column(String)  # new, processing, completed
+    extracted_data = Column(LARGE_JSON)
+    
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    user = relationship("User", back_populates="loan_applications")
+    documents = relationship("Document", back_populates="loan_application")
+
+class CompressionDictionary(BaseModel):
+    __tablename__ = "compression_dictionaries"
+
+    codec = Column(String, nullable=False)  # zlib, zstd
+    data = Column(LargeBinary, nullable=False)
+
+class AuditLog(BaseModel):
+    __tablename__ = "audit_logs"
+
+    action = Column(String)
+    entity_type = Column(String)
+    entity_id = Column(Integer)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    details = Column(JSON)
     ip_address = Column(String) 
\ No newline at end of file
@@ -0,0 +1,40 @@
+import json
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+from ..services.compression import compress_text, decompress_text
+
+class StoredBytes(LargeBinary):
+    """Binary column that passes through text still held by rows not yet converted"""
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            return bytes(value) if isinstance(value, memoryview) else value
+        return process
+
+class CompressedText(TypeDecorator):
+    """Text compressed on write and decompressed on read (see app.services.compression)"""
+    impl = StoredBytes
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
+
+class CompressedJSON(CompressedText):
+    """JSON document stored as compressed text"""
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return super().process_bind_param(json.dumps(value, default=str), dialect)
+
+    def process_result_value(self, value, dialect):
+        value = super().process_result_value(value, dialect)
+        return json.loads(value) if value is not None else None
@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from ..core.config import settings
+from ..core.metrics import stage_timer
+from ..db.database import AsyncSessionLocal
+from ..models.models import Document, DocumentPage, LoanApplication
+from .document_processor import EXTRACTOR_VERSION
+from .loan_processor import LOAN_INFO_FIELDS, LoanProcessor
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ApplicationNotFoundError(LookupError):
+    """Raised when a loan application or its documents do not exist"""
+
+async def plan_extraction(
+    db: AsyncSession,
+    loan_processor: LoanProcessor,
+    loan_application_id: int,
+    force: bool
+) -> Tuple[Dict[int, Dict[str, any]], List[Tuple[int, str]], Dict[int, str], Dict[int, List[str]]]:
+    """Read phase of process_application.
+
+    Returns the reused per-document results, the (document_id, fingerprint)
+    pairs to extract, the skipped documents with their reason, and the page
+    texts of the documents to extract.
+    """
+    documents = (await db.execute(
+        select(
+            Document.id,
+            Document.status,
+            Document.content_hash,
+            Document.extraction_fingerprint,
+            Document.extracted_data
+        )
+        .where(Document.loan_application_id == loan_application_id)
+        .order_by(Document.id)
+    )).all()
+
+    if not documents:
+        raise ApplicationNotFoundError("No documents found for this loan application")
+
+    if await db.get(LoanApplication, loan_application_id) is None:
+        raise ApplicationNotFoundError("Loan application not found")
+
+    # Documents still uploading or being extracted have no final pages to fingerprint yet
+    skipped = {doc.id: doc.status for doc in documents if doc.status != 'processed'}
+    documents = [doc for doc in documents if doc.id not in skipped]
+
+    # Fingerprint from the upload hash where there is one, so unchanged documents are never read
+    fingerprints = {
+        doc.id: loan_processor.document_fingerprint(f"{doc.content_hash}:{EXTRACTOR_VERSION}")
+        for doc in documents
+        if doc.content_hash
+    }
+    results = {}
+    candidates = []
+    for doc in documents:
+        if not force and doc.extracted_data is not None and fingerprints.get(doc.id) == doc.extraction_fingerprint:
+            results[doc.id] = doc.extracted_data
+        else:
+            candidates.append(doc)
+
+    pages = defaultdict(list)
+    if candidates:
+        rows = await db.execute(
+            select(DocumentPage.document_id, DocumentPage.content)
+            .where(DocumentPage.document_id.in_([doc.id for doc in candidates]))
+            .order_by(DocumentPage.document_id, DocumentPage.page_number)
+        )
+        for document_id, content in rows:
+            pages[document_id].append(content)
+
+    to_extract = []
+    for doc in candidates:
+        if not pages[doc.id]:
+            # Never stored, so the document is extracted once it has pages
+            skipped[doc.id] = 'no_pages'
+            continue
+        fingerprint = fingerprints.get(doc.id)
+        if fingerprint is None:
+            # Documents uploaded before content hashing are fingerprinted by their text
+            text_hash = hashlib.sha256("\n\n".join(pages[doc.id]).encode("utf-8")).hexdigest()
+            fingerprint = loan_processor.document_fingerprint(text_hash)
+            if not force and doc.extracted_data is not None and fingerprint == doc.extraction_fingerprint:
+                results[doc.id] = doc.extracted_data
+                continue
+        to_extract.append((doc.id, fingerprint))
+
+    return results, to_extract, skipped, pages
+
+async def process_application(
+    loan_processor: LoanProcessor,
+    loan_application_id: int,
+    force: bool = False,
+    on_event: Optional[Callable[[str, Dict[str, any]], None]] = None,
+    session_factory: async_sessionmaker = AsyncSessionLocal
+) -> Dict[str, any]:
+    """Extract loan information for an application, reusing unchanged per-document results.
+
+    Each document's partial extraction is stored with a fingerprint of its
+    content, extractor and prompt. Only documents whose fingerprint changed
+    (or all of them, with force) are sent to the LLM before the stored and
+    new per-document results are merged. Documents that are not processed
+    yet, or have no pages, are skipped and reported rather than stored with
+    an empty result; documents whose extraction fails are reported with
+    their error. on_event, if given, is called with a "documents" event once
+    the work is planned and a "document" event as each document is reused,
+    skipped, extracted or fails.
+
+    Reads and writes use short sessions of their own, so no pooled
+    connection is held while the LLM runs.
+    """
+    emit = on_event or (lambda event, data: None)
+
+    async with session_factory() as db:
+        results, to_extract, skipped, pages = await plan_extraction(db, loan_processor, loan_application_id, force)
+
+    emit('documents', {
+        'loan_application_id': loan_application_id,
+        'total': len(results) + len(to_extract) + len(skipped),
+        'reused': len(results),
+        'skipped': len(skipped),
+        'to_extract': len(to_extract)
+    })
+    for document_id in results:
+        emit('document', {'document_id': document_id, 'status': 'reused'})
+    for document_id, reason in skipped.items():
+        emit('document', {'document_id': document_id, 'status': 'skipped', 'reason': reason})
+
+    semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+    async def extract(document_id: int) -> Dict[str, any]:
+        async with semaphore:
+            extraction_result = await run_in_threadpool(loan_processor.extract_document_info, pages[document_id])
+        if extraction_result['status'] == 'success':
+            emit('document', {
+                'document_id': document_id,
+                'status': 'extracted',
+                'source': extraction_result.get('source', 'llm'),
+                # Loan fields only, not bookkeeping such as confidence_score
+                'fields': [
+                    field for field in LOAN_INFO_FIELDS
+                    if extraction_result['data'].get(field) not in (None, "")
+                ]
+            })
+        else:
+            emit('document', {
+                'document_id': document_id,
+                'status': 'failed',
+                'error': extraction_result['error_message']
+            })
+        return extraction_result
+
+    extraction_results = await asyncio.gather(*(extract(document_id) for document_id, _ in to_extract))
+
+    updates = []
+    failed = {}
+    for (document_id, fingerprint), extraction_result in zip(to_extract, extraction_results):
+        if extraction_result['status'] != 'success':
+            # Left without a fingerprint so the next run retries it
+            logger.error(f"Extraction failed for document {document_id}: {extraction_result['error_message']}")
+            failed[document_id] = extraction_result['error_message']
+            continue
+        results[document_id] = extraction_result['data']
+        updates.append({
+            'id': document_id,
+            'extracted_data': extraction_result['data'],
+            'extraction_fingerprint': fingerprint
+        })
+
+    partials = [data for data in results.values() if data]
+    if partials:
+        processing_result = loan_processor.complete_extraction(partials)
+    elif not results and not to_extract:
+        processing_result = {
+            'status': 'error',
+            'error_message': "No documents have finished processing yet"
+        }
+    else:
+        processing_result = {
+            'status': 'error',
+            'error_message': "No loan information could be extracted from the documents"
+        }
+
+    async with session_factory() as db:
+        if updates:
+            await db.execute(update(Document), updates)
+
+        if processing_result['status'] == 'success':
+            # Update loan application with extracted data
+            await db.execute(
+                update(LoanApplication)
+                .where(LoanApplication.id == loan_application_id)
+                .values(extracted_data=processing_result['data'], processing_status='completed')
+            )
+
+        # Per-document results are kept even when the merged result is incomplete
+        with stage_timer("db_commit"):
+            await db.commit()
+
+    processing_result['extracted_documents'] = len(updates)
+    processing_result['reused_documents'] = len(results) - len(updates)
+    processing_result['failed_documents'] = [
+        {'document_id': document_id, 'error': error} for document_id, error in failed.items()
+    ]
+    processing_result['skipped_documents'] = [
+        {'document_id': document_id, 'reason': reason} for document_id, reason in skipped.items()
+    ]
+    return processing_result
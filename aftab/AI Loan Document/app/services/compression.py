@@ -0,0 +1,159 @@
+import threading
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from ..core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Compressed values start with a NUL byte, which stored text never begins with,
+# then a codec byte and the 4-byte id of the dictionary used (0 for none).
+# Anything else is plain UTF-8 written before compression was turned on.
+MAGIC = b"\x00"
+CODECS = {b"r": "raw", b"z": "zlib", b"s": "zstd"}
+CODEC_BYTES = {codec: marker for marker, codec in CODECS.items()}
+HEADER_SIZE = 6
+
+# Largest preset dictionary deflate can use (its window size)
+ZLIB_MAX_DICTIONARY = 32 * 1024
+
+DICTIONARY_TABLE = "compression_dictionaries"
+
+@lru_cache(maxsize=8)
+def _zstd_dictionary(dictionary: bytes):
+    """Parsed zstd dictionary, shared by every compressor and decompressor that uses it"""
+    import zstandard
+    return zstandard.ZstdCompressionDict(dictionary)
+
+def compress(data: bytes, codec: str, level: int, dictionary: Optional[bytes] = None) -> bytes:
+    """Compress data with codec, optionally primed with a dictionary"""
+    if codec == "zstd":
+        import zstandard
+        dict_data = _zstd_dictionary(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=level, dict_data=dict_data).compress(data)
+    if dictionary:
+        compressor = zlib.compressobj(level, zdict=dictionary)
+        return compressor.compress(data) + compressor.flush()
+    return zlib.compress(data, level)
+
+def decompress(payload: bytes, codec: str, dictionary: Optional[bytes] = None) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        dict_data = _zstd_dictionary(dictionary) if dictionary else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(payload)
+    if dictionary:
+        decompressor = zlib.decompressobj(zdict=dictionary)
+        return decompressor.decompress(payload) + decompressor.flush()
+    return zlib.decompress(payload)
+
+def train_dictionary(samples: List[str], codec: str, size: int) -> bytes:
+    """Dictionary of the content the samples share, for compressing short values like single pages.
+
+    zstd trains one itself. zlib has no trainer, so its preset dictionary is
+    the lines and words repeated across samples, most common last, where
+    deflate reaches them with the shortest back-references.
+    """
+    if codec == "zstd":
+        import zstandard
+        return zstandard.train_dictionary(size, [sample.encode("utf-8") for sample in samples]).as_bytes()
+
+    size = min(size, ZLIB_MAX_DICTIONARY)
+    lines = Counter()
+    phrases = Counter()
+    words = Counter()
+    for sample in samples:
+        tokens = sample.split()
+        lines.update({line.strip() for line in sample.splitlines() if len(line.strip()) > 8})
+        phrases.update({" ".join(tokens[index:index + 4]) for index in range(len(tokens) - 3)})
+        words.update({word for word in tokens if len(word) > 3})
+    # Whole repeated lines first, then the phrases and words that recur across lines
+    common = [line for line, count in lines.most_common() if count > 1]
+    common += [phrase for phrase, count in phrases.most_common() if count > 1]
+    common += [word for word, count in words.most_common() if count > 1]
+
+    chunks = []
+    used = 0
+    for chunk in common:
+        chunk_bytes = chunk.encode("utf-8") + b"\n"
+        if used + len(chunk_bytes) > size:
+            break
+        chunks.append(chunk_bytes)
+        used += len(chunk_bytes)
+    return b"".join(reversed(chunks))
+
+class DictionaryStore:
+    """Compression dictionaries from the compression_dictionaries table, loaded once per process.
+
+    Dictionaries are never changed or deleted, since values written with one
+    cannot be read without it; training adds a new one that later writes use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dictionaries: Dict[int, Tuple[str, bytes]] = {}
+        self._loaded = False
+
+    def load(self):
+        from ..db.database import engine
+        with engine.connect() as conn:
+            rows = conn.execute(text(f"SELECT id, codec, data FROM {DICTIONARY_TABLE}")).all()
+        with self._lock:
+            self._dictionaries = {row.id: (row.codec, bytes(row.data)) for row in rows}
+            self._loaded = True
+        logger.info(f"Loaded {len(rows)} compression dictionaries")
+
+    def get(self, dictionary_id: int) -> bytes:
+        with self._lock:
+            known = dictionary_id in self._dictionaries
+        if not known:
+            # Written by a process that trained a newer dictionary
+            self.load()
+        with self._lock:
+            if dictionary_id not in self._dictionaries:
+                raise LookupError(f"Compression dictionary {dictionary_id} not found")
+            return self._dictionaries[dictionary_id][1]
+
+    def active(self, codec: str) -> Tuple[int, Optional[bytes]]:
+        """Newest dictionary for codec as (id, data), or (0, None) when none has been trained"""
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            candidates = [
+                (dictionary_id, data)
+                for dictionary_id, (dictionary_codec, data) in self._dictionaries.items()
+                if dictionary_codec == codec
+            ]
+        return max(candidates) if candidates else (0, None)
+
+dictionary_store = DictionaryStore()
+
+def compress_text(value: str) -> bytes:
+    """Stored form of a text value: compressed with the configured codec and newest dictionary"""
+    data = value.encode("utf-8")
+    if len(data) >= settings.COMPRESSION_MIN_BYTES:
+        codec = settings.COMPRESSION_CODEC
+        dictionary_id, dictionary = dictionary_store.active(codec)
+        payload = compress(data, codec, settings.COMPRESSION_LEVEL, dictionary)
+        if len(payload) + HEADER_SIZE < len(data):
+            return MAGIC + CODEC_BYTES[codec] + dictionary_id.to_bytes(4, "big") + payload
+    if data.startswith(MAGIC):
+        return MAGIC + CODEC_BYTES["raw"] + bytes(4) + data
+    return data
+
+def decompress_text(value) -> str:
+    """Text of a stored value, whether compressed, raw or left as text by an unconverted row"""
+    if isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not value.startswith(MAGIC):
+        return value.decode("utf-8")
+    codec = CODECS[value[1:2]]
+    payload = value[HEADER_SIZE:]
+    if codec == "raw":
+        return payload.decode("utf-8")
+    dictionary_id = int.from_bytes(value[2:HEADER_SIZE], "big")
+    dictionary = dictionary_store.get(dictionary_id) if dictionary_id else None
+    return decompress(payload, codec, dictionary).decode("utf-8")
@@ -1,126 +1,536 @@
-import os
-from typing import Optional, Dict, List
-import pypdf
-from pdf2image import convert_from_path
-import pytesseract
-from PIL import Image
-import boto3
-from ..core.config import settings
-import magic
-import logging
-
-logger = logging.getLogger(__name__)
-
-class DocumentProcessor:
-    def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
-        ) if settings.AWS_ACCESS_KEY_ID else None
-
-    def validate_file(self, file_path: str) -> bool:
-        """Validate file type and size"""
-        try:
-            file_type = magic.from_file(file_path, mime=True)
-            file_size = os.path.getsize(file_path)
-            
-            if file_type not in settings.ALLOWED_FILE_TYPES:
-                raise ValueError(f"Invalid file type: {file_type}")
-            
-            if file_size > settings.MAX_FILE_SIZE:
-                raise ValueError(f"File too large: {file_size} bytes")
-            
-            return True
-        except Exception as e:
-            logger.error(f"File validation error: {str(e)}")
-            return False
-
-    def upload_to_s3(self, file_path: str, object_name: str) -> str:
-        """Upload file to S3 and return the S3 URL"""
-        if not self.s3_client:
-            return file_path
-        
-        try:
-            self.s3_client.upload_file(
-                file_path,
-                settings.S3_BUCKET_NAME,
-                object_name
-            )
-            return f"s3://{settings.S3_BUCKET_NAME}/{object_name}"
-        except Exception as e:
-            logger.error(f"S3 upload error: {str(e)}")
-            raise
-
-    def extract_text_from_pdf(self, file_path: str) -> Dict[str, any]:
-        """Extract text from PDF and perform OCR if needed"""
-        try:
-            # Try direct text extraction first
-            pdf_reader = pypdf.PdfReader(file_path)
-            text_content = []
-            metadata = {}
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                text = page.extract_text()
-                
-                # If page is empty or has very little text, try OCR
-                if len(text.strip()) < 50:
-                    images = convert_from_path(file_path, first_page=page_num+1, last_page=page_num+1)
-                    for image in images:
-                        text = pytesseract.image_to_string(image)
-                
-                if text.strip():  # Only add non-empty pages
-                    text_content.append({
-                        'page_number': page_num + 1,
-                        'content': text.strip()
-                    })
-            
-            # Extract metadata
-            metadata = {
-                'title': pdf_reader.metadata.get('/Title', ''),
-                'author': pdf_reader.metadata.get('/Author', ''),
-                'creation_date': pdf_reader.metadata.get('/CreationDate', ''),
-                'total_pages': len(pdf_reader.pages)
-            }
-            
-            return {
-                'text_content': text_content,
-                'metadata': metadata,
-                'status': 'success'
-            }
-            
-        except Exception as e:
-            logger.error(f"PDF processing error: {str(e)}")
-            return {
-                'text_content': [],
-                'metadata': {},
-                'status': 'error',
-                'error_message': str(e)
-            }
-
-    def process_document(self, file_path: str, object_name: str) -> Dict[str, any]:
-        """Main method to process a document"""
-        try:
-            # Validate file
-            if not self.validate_file(file_path):
-                raise ValueError("File validation failed")
-            
-            # Upload to S3 if configured
-            storage_path = self.upload_to_s3(file_path, object_name)
-            
-            # Extract text and metadata
-            extraction_result = self.extract_text_from_pdf(file_path)
-            
-            return {
-                'storage_path': storage_path,
-                'extraction_result': extraction_result,
-                'status': 'success'
-            }
-            
-        except Exception as e:
-            logger.error(f"Document processing error: {str(e)}")
-            return {
-                'status': 'error',
-                'error_message': str(e)
+import os
+import hashlib
+import json
+import tempfile
+import threading
+import time
+import contextvars
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Dict, List, Tuple
+from ..core.config import settings
+from ..core.metrics import observe_stage, stage_timer
+from .cache import SQLiteCache
+from .page_classifier import classify_page
+import logging
+
+# pypdf, pdf2image, pytesseract, PIL, boto3 and magic are imported where they are
+# first used, so workers that never touch a document do not pay for loading them
+if TYPE_CHECKING:
+    import pypdf
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever extract_text_from_pdf changes in a way that alters its output
+EXTRACTOR_VERSION = 3
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+@lru_cache(maxsize=1)
+def get_extraction_cache() -> Optional[SQLiteCache]:
+    """Process-wide extraction cache, or None when disabled"""
+    if not settings.EXTRACTION_CACHE_ENABLED:
+        return None
+    return SQLiteCache(settings.EXTRACTION_CACHE_PATH, settings.EXTRACTION_CACHE_MAX_BYTES)
+
+def extraction_cache_key(content_hash: str) -> str:
+    """Cache key for a file's extraction, versioned by the settings that affect the output"""
+    import pypdf
+    version = (
+        f"v{EXTRACTOR_VERSION}:pypdf{pypdf.__version__}:"
+        f"ocr{settings.OCR_TEXT_THRESHOLD}-{settings.OCR_SCAN_MIN_COVERAGE}-{settings.OCR_MIN_TEXT_DENSITY}:"
+        f"dpi{settings.OCR_DPI}"
+    )
+    return f"{version}:{content_hash}"
+
+def _ocr_image(image: "Image.Image") -> Tuple[str, float]:
+    """OCR a single rasterized page (module level so it can be sent to worker processes).
+
+    Returns the text and the OCR time, since worker processes cannot record metrics themselves.
+    """
+    import pytesseract
+    start = time.perf_counter()
+    text = pytesseract.image_to_string(image)
+    return text, time.perf_counter() - start
+
+def _ocr_file(image_path: str) -> Tuple[str, float]:
+    """OCR a page rasterized to disk, so only the path crosses the process boundary"""
+    from PIL import Image
+    with Image.open(image_path) as image:
+        return _ocr_image(image)
+
+def pdf_metadata(pdf_reader: "pypdf.PdfReader") -> Dict[str, any]:
+    info = pdf_reader.metadata or {}
+    return {
+        'title': info.get('/Title', ''),
+        'author': info.get('/Author', ''),
+        'creation_date': info.get('/CreationDate', ''),
+        'total_pages': len(pdf_reader.pages)
+    }
+
+def page_summary(page: Dict[str, any]) -> Dict[str, any]:
+    """Page fields sent with progress events, without the page text"""
+    return {
+        'page_number': page['page_number'],
+        'ocr_used': page['ocr_used'],
+        'ocr_reason': page.get('ocr_reason'),
+        'char_count': len(page['content'])
+    }
+
+def _contiguous_runs(page_numbers: List[int]) -> List[List[int]]:
+    """Group sorted page numbers into runs of consecutive pages"""
+    runs = []
+    for page_number in page_numbers:
+        if runs and page_number == runs[-1][-1] + 1:
+            runs[-1].append(page_number)
+        else:
+            runs.append([page_number])
+    return runs
+
+class DocumentProcessor:
+    def __init__(self, ocr_workers: Optional[int] = None, s3_client=None):
+        # An explicit s3_client (e.g. from moto) replaces the configured one
+        self.s3_client = s3_client or self._create_s3_client()
+        self.ocr_workers = max(1, ocr_workers or settings.OCR_MAX_WORKERS)
+        self._ocr_pool = None
+        self._ocr_pool_lock = threading.Lock()
+        
+        # Large files are uploaded in parts, several at a time
+        self.transfer_config = None
+        if self.s3_client:
+            from boto3.s3.transfer import TransferConfig
+            self.transfer_config = TransferConfig(
+                multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+                multipart_chunksize=settings.S3_MULTIPART_CHUNKSIZE,
+                max_concurrency=settings.S3_MAX_CONCURRENCY,
+                use_threads=True
+            )
+        self._upload_pool = ThreadPoolExecutor(
+            max_workers=settings.S3_UPLOAD_WORKERS,
+            thread_name_prefix="s3-upload"
+        )
+
+    @staticmethod
+    def _create_s3_client():
+        """Pooled S3 client, or None when S3 is not configured (boto3 is then never imported)"""
+        if not settings.AWS_ACCESS_KEY_ID:
+            return None
+        import boto3
+        from botocore.config import Config as BotoConfig
+        return boto3.client(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION,
+            config=BotoConfig(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS)
+        )
+
+    def _get_ocr_pool(self) -> ProcessPoolExecutor:
+        """Lazily create the process pool shared by all OCR calls of this processor"""
+        with self._ocr_pool_lock:
+            if self._ocr_pool is None:
+                self._ocr_pool = ProcessPoolExecutor(max_workers=self.ocr_workers)
+            return self._ocr_pool
+
+    def close(self):
+        """Shut down the OCR process pool and the upload threads"""
+        self._upload_pool.shutdown(wait=True)
+        with self._ocr_pool_lock:
+            if self._ocr_pool is not None:
+                self._ocr_pool.shutdown(wait=True)
+                self._ocr_pool = None
+
+    def validate_file(self, file_path: str) -> bool:
+        """Validate file type and size"""
+        start = time.perf_counter()
+        valid = self._validate_file(file_path)
+        observe_stage("validate_file", time.perf_counter() - start, "success" if valid else "rejected")
+        return valid
+
+    def _validate_file(self, file_path: str) -> bool:
+        try:
+            import magic
+            file_type = magic.from_file(file_path, mime=True)
+            file_size = os.path.getsize(file_path)
+            
+            if file_type not in settings.ALLOWED_FILE_TYPES:
+                raise ValueError(f"Invalid file type: {file_type}")
+            
+            if file_size > settings.MAX_FILE_SIZE:
+                raise ValueError(f"File too large: {file_size} bytes")
+            
+            return True
+        except Exception as e:
+            logger.error(f"File validation error: {str(e)}")
+            return False
+
+    def upload_to_s3(self, file_path: str, object_name: str) -> str:
+        """Upload file to S3 and return the S3 URL"""
+        if not self.s3_client:
+            return file_path
+        
+        try:
+            with stage_timer("s3_upload"):
+                self.s3_client.upload_file(
+                    file_path,
+                    settings.S3_BUCKET_NAME,
+                    object_name,
+                    Config=self.transfer_config
+                )
+            return f"s3://{settings.S3_BUCKET_NAME}/{object_name}"
+        except Exception as e:
+            logger.error(f"S3 upload error: {str(e)}")
+            raise
+
+    def rasterize_pages(self, file_path: str, page_numbers: List[int]) -> Dict[int, "Image.Image"]:
+        """Rasterize the given 1-based pages, rendering each run of consecutive pages in one pass"""
+        from pdf2image import convert_from_path
+        images = {}
+        for run in _contiguous_runs(sorted(page_numbers)):
+            with stage_timer("rasterize", count=len(run)):
+                rendered = convert_from_path(
+                    file_path,
+                    dpi=settings.OCR_DPI,
+                    first_page=run[0],
+                    last_page=run[-1],
+                    thread_count=min(self.ocr_workers, len(run))
+                )
+            images.update(zip(run, rendered))
+        return images
+
+    def ocr_images(
+        self,
+        images: Dict[int, "Image.Image"],
+        on_text: Optional[Callable[[int, str], None]] = None
+    ) -> Dict[int, str]:
+        """OCR rasterized pages, in parallel across the process pool when enabled.
+
+        on_text is called with each page's text as soon as it is ready, in page order.
+        """
+        if settings.OCR_PARALLEL and self.ocr_workers > 1 and len(images) > 1:
+            results = self._get_ocr_pool().map(_ocr_image, images.values())
+        else:
+            results = map(_ocr_image, images.values())
+        
+        texts = {}
+        for page_number, (text, seconds) in zip(images.keys(), results):
+            observe_stage("ocr", seconds)
+            texts[page_number] = text
+            if on_text:
+                on_text(page_number, text)
+        return texts
+
+    def extract_text_from_pdf(
+        self,
+        file_path: str,
+        on_page: Optional[Callable[[Dict[str, any]], None]] = None,
+        pdf_reader: Optional["pypdf.PdfReader"] = None
+    ) -> Dict[str, any]:
+        """Extract text from PDF and perform OCR if needed.
+
+        on_page receives a page_summary for each non-empty page as it is finished.
+        A pdf_reader the caller already opened on file_path is reused.
+        """
+        try:
+            import pypdf
+            # Try direct text extraction first
+            with stage_timer("pypdf"):
+                if pdf_reader is None:
+                    pdf_reader = pypdf.PdfReader(file_path)
+                page_texts = [page.extract_text() for page in pdf_reader.pages]
+            
+            # Only pages that look scanned are OCR'd, in a single batch
+            ocr_decisions = [
+                classify_page(page, text)
+                for page, text in zip(pdf_reader.pages, page_texts)
+            ]
+            ocr_pages = [
+                page_num + 1
+                for page_num, (needs_ocr, _) in enumerate(ocr_decisions)
+                if needs_ocr
+            ]
+            def page_entry(page_num: int) -> Dict[str, any]:
+                return {
+                    'page_number': page_num + 1,
+                    'content': page_texts[page_num].strip(),
+                    'ocr_used': ocr_decisions[page_num][0],
+                    'ocr_reason': ocr_decisions[page_num][1]
+                }
+            
+            def report(page_num: int):
+                if on_page and page_texts[page_num].strip():
+                    on_page(page_summary(page_entry(page_num)))
+            
+            # Pages with a usable text layer are done before any OCR starts
+            for page_num, (needs_ocr, _) in enumerate(ocr_decisions):
+                if not needs_ocr:
+                    report(page_num)
+            
+            if ocr_pages:
+                def on_ocr_text(page_number: int, text: str):
+                    page_texts[page_number - 1] = text
+                    report(page_number - 1)
+                
+                self.ocr_images(self.rasterize_pages(file_path, ocr_pages), on_text=on_ocr_text)
+            
+            text_content = [
+                page_entry(page_num)
+                for page_num, text in enumerate(page_texts)
+                if text.strip()  # Only add non-empty pages
+            ]
+            
+            return {
+                'text_content': text_content,
+                'metadata': pdf_metadata(pdf_reader),
+                'status': 'success'
+            }
+            
+        except Exception as e:
+            logger.error(f"PDF processing error: {str(e)}")
+            return {
+                'text_content': [],
+                'metadata': {},
+                'status': 'error',
+                'error_message': str(e)
+            }
+
+    def rasterize_pages_to_files(self, file_path: str, page_numbers: List[int], output_folder: str) -> Dict[int, str]:
+        """Rasterize the given 1-based pages to PNGs in output_folder, one pdftoppm pass per run of consecutive pages"""
+        from pdf2image import convert_from_path
+        paths = {}
+        for run in _contiguous_runs(sorted(page_numbers)):
+            with stage_timer("rasterize", count=len(run)):
+                rendered = convert_from_path(
+                    file_path,
+                    dpi=settings.OCR_DPI,
+                    first_page=run[0],
+                    last_page=run[-1],
+                    output_folder=output_folder,
+                    # The underscore keeps one run's prefix from matching another's files
+                    output_file=f"run{run[0]}_",
+                    fmt="png",
+                    paths_only=True,
+                    thread_count=min(self.ocr_workers, len(run))
+                )
+            # pdftoppm names each file <prefix>-<page number>.png
+            for path in rendered:
+                paths[int(os.path.splitext(path)[0].rsplit("-", 1)[1])] = path
+        return paths
+
+    def _submit_ocr(self, image_path: str) -> Future:
+        if settings.OCR_PARALLEL and self.ocr_workers > 1:
+            return self._get_ocr_pool().submit(_ocr_file, image_path)
+        future = Future()
+        future.set_result(_ocr_file(image_path))
+        return future
+
+    def iter_pages(self, file_path: str, pdf_reader: Optional["pypdf.PdfReader"] = None) -> Iterator[Dict[str, any]]:
+        """Yield extracted pages one at a time, in order, skipping empty pages.
+
+        Pages that need OCR are rasterized a window at a time to temporary PNG
+        files and OCR'd in the process pool with a bounded number in flight, so
+        memory stays flat however many pages the document has.
+        """
+        if pdf_reader is None:
+            import pypdf
+            pdf_reader = pypdf.PdfReader(file_path)
+        window = max(2, self.ocr_workers * 2)
+        pending = deque()  # [page, OCR future or None, image path or None]
+        unrendered = []  # pending entries that need OCR and have no image yet
+        
+        def render():
+            paths = self.rasterize_pages_to_files(
+                file_path, [entry[0]['page_number'] for entry in unrendered], temp_dir
+            )
+            for entry in unrendered:
+                entry[2] = paths[entry[0]['page_number']]
+                entry[1] = self._submit_ocr(entry[2])
+            unrendered.clear()
+        
+        def ready(entry) -> bool:
+            if not entry[0]['ocr_used']:
+                return True
+            if entry[1] is None:
+                return False
+            # Wait on OCR only once the window is full
+            in_flight = sum(1 for _, future, _ in pending if future is not None)
+            return entry[1].done() or in_flight > window
+        
+        def finish(page: Dict[str, any], future: Optional[Future], image_path: Optional[str]):
+            if future is not None:
+                text, seconds = future.result()
+                observe_stage("ocr", seconds)
+                os.remove(image_path)
+                page['content'] = text
+            page['content'] = page['content'].strip()
+            return page
+        
+        with tempfile.TemporaryDirectory(prefix="ocr-pages-") as temp_dir:
+            for page_num, pdf_page in enumerate(pdf_reader.pages):
+                with stage_timer("pypdf"):
+                    text = pdf_page.extract_text()
+                needs_ocr, reason = classify_page(pdf_page, text)
+                entry = [{
+                    'page_number': page_num + 1,
+                    'content': text,
+                    'ocr_used': needs_ocr,
+                    'ocr_reason': reason
+                }, None, None]
+                pending.append(entry)
+                if needs_ocr:
+                    unrendered.append(entry)
+                
+                # Rasterize a window of scanned pages per pass, or sooner when
+                # text pages are piling up behind one still waiting for its image
+                if len(unrendered) >= window or (unrendered and len(pending) > window * 4):
+                    render()
+                
+                # Hand pages on in order
+                while pending and ready(pending[0]):
+                    page = finish(*pending.popleft())
+                    if page['content']:
+                        yield page
+            
+            if unrendered:
+                render()
+            while pending:
+                page = finish(*pending.popleft())
+                if page['content']:
+                    yield page
+
+    def extract_text_streaming(
+        self,
+        file_path: str,
+        page_sink: Callable[[Dict[str, any]], None],
+        on_page: Optional[Callable[[Dict[str, any]], None]] = None,
+        pdf_reader: Optional["pypdf.PdfReader"] = None
+    ) -> Dict[str, any]:
+        """Extract text page by page into page_sink instead of returning it, for very large PDFs"""
+        try:
+            if pdf_reader is None:
+                import pypdf
+                pdf_reader = pypdf.PdfReader(file_path)
+            pages = 0
+            for page in self.iter_pages(file_path, pdf_reader):
+                page_sink(page)
+                pages += 1
+                if on_page:
+                    on_page(page_summary(page))
+            
+            return {
+                'text_content': [],
+                'metadata': pdf_metadata(pdf_reader),
+                'pages': pages,
+                'streamed': True,
+                'status': 'success'
+            }
+            
+        except Exception as e:
+            logger.error(f"PDF processing error: {str(e)}")
+            return {
+                'text_content': [],
+                'metadata': {},
+                'status': 'error',
+                'error_message': str(e)
+            }
+
+    def extract_text_cached(
+        self,
+        file_path: str,
+        content_hash: Optional[str] = None,
+        on_page: Optional[Callable[[Dict[str, any]], None]] = None,
+        pdf_reader: Optional["pypdf.PdfReader"] = None
+    ) -> Dict[str, any]:
+        """Extract text, reusing the stored result for files with identical content"""
+        cache = get_extraction_cache()
+        if cache is None:
+            return self.extract_text_from_pdf(file_path, on_page, pdf_reader)
+        
+        try:
+            key = extraction_cache_key(content_hash or file_sha256(file_path))
+            cached = cache.get(key)
+        except Exception as e:
+            logger.error(f"Extraction cache lookup error: {str(e)}")
+            return self.extract_text_from_pdf(file_path, on_page, pdf_reader)
+        
+        if cached is not None:
+            extraction_result = json.loads(cached)
+            extraction_result['cache_hit'] = True
+            if on_page:
+                for page in extraction_result['text_content']:
+                    on_page(page_summary(page))
+            return extraction_result
+        
+        extraction_result = self.extract_text_from_pdf(file_path, on_page, pdf_reader)
+        if extraction_result['status'] == 'success':
+            try:
+                cache.set(key, json.dumps(extraction_result, default=str).encode("utf-8"))
+            except Exception as e:
+                logger.error(f"Extraction cache store error: {str(e)}")
+        
+        extraction_result['cache_hit'] = False
+        return extraction_result
+
+    def process_document(
+        self,
+        file_path: str,
+        object_name: str,
+        content_hash: Optional[str] = None,
+        on_page: Optional[Callable[[Dict[str, any]], None]] = None,
+        page_sink: Optional[Callable[[Dict[str, any]], None]] = None
+    ) -> Dict[str, any]:
+        """Main method to process a document.
+
+        With a page_sink, PDFs of STREAMING_EXTRACTION_MIN_PAGES pages or more
+        are extracted page by page into it and bypass the extraction cache, so
+        their text is never held in memory all at once.
+        """
+        try:
+            import pypdf
+            # Validate file
+            if not self.validate_file(file_path):
+                raise ValueError("File validation failed")
+            
+            # Opened once to count pages and then handed to the extraction, so the PDF is parsed once
+            pdf_reader = pypdf.PdfReader(file_path) if page_sink is not None else None
+            if pdf_reader is not None and len(pdf_reader.pages) >= settings.STREAMING_EXTRACTION_MIN_PAGES:
+                extract = lambda: self.extract_text_streaming(file_path, page_sink, on_page, pdf_reader)
+            else:
+                extract = lambda: self.extract_text_cached(file_path, content_hash, on_page, pdf_reader)
+            
+            # Upload to S3 if configured, in the background while text is extracted
+            if self.s3_client:
+                # Run in a copy of this context so the upload is labelled with the caller's endpoint
+                upload_future = self._upload_pool.submit(
+                    contextvars.copy_context().run, self.upload_to_s3, file_path, object_name
+                )
+                try:
+                    # Extract text and metadata
+                    extraction_result = extract()
+                finally:
+                    # Always wait so the file is not removed while it is still uploading
+                    storage_path = upload_future.result()
+            else:
+                storage_path = file_path
+                extraction_result = extract()
+            
+            return {
+                'storage_path': storage_path,
+                'extraction_result': extraction_result,
+                'status': 'success'
+            }
+            
+        except Exception as e:
+            logger.error(f"Document processing error: {str(e)}")
+            return {
+                'status': 'error',
+                'error_message': str(e)
             } 
\ No newline at end of file
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+from typing import AsyncIterator, Dict, List, Optional
+from ..core.config import settings
+
+class Subscription:
+    """One client's bounded view of an EventChannel, consumed on the event loop that created it.
+
+    Producers never block: when the buffer is full, droppable events (pages)
+    are counted and skipped, and any other event ends the subscription with an
+    "overflow" event so the client can fall back to polling.
+    """
+
+    def __init__(self, channel: "EventChannel", max_events: int):
+        self.channel = channel
+        self.dropped = 0
+        self.closed = False
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_events)
+
+    def offer(self, event: str, data: Dict[str, any], droppable: bool):
+        """Hand an event over from any thread"""
+        self._loop.call_soon_threadsafe(self._put, event, data, droppable)
+
+    def end(self):
+        self._loop.call_soon_threadsafe(self._put, None, None, False)
+
+    def _put(self, event: Optional[str], data: Optional[Dict[str, any]], droppable: bool):
+        if self.closed:
+            return
+        if not self._queue.full():
+            self._queue.put_nowait((event, data))
+            self.closed = event is None
+            return
+        if droppable:
+            self.dropped += 1
+            return
+        # Never grow past the bound: replace the backlog with a single overflow notice
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(("overflow", {'detail': "Client fell behind; poll for the final status"}))
+        self.closed = True
+
+    async def events(self, keepalive_seconds: Optional[float] = None) -> AsyncIterator[Optional[tuple]]:
+        """Yield (event, data) until the channel closes; None is yielded when idle for keepalive_seconds"""
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                event, data = item
+                if event is None:
+                    return
+                if self.dropped:
+                    data = {**data, 'dropped_events': self.dropped}
+                    self.dropped = 0
+                yield event, data
+                if event == "overflow":
+                    return
+        finally:
+            self.channel.unsubscribe(self)
+
+class EventChannel:
+    """Fan-out of progress events from worker threads to any number of streaming clients"""
+
+    def __init__(self, max_events: Optional[int] = None):
+        self.max_events = max_events or settings.SSE_MAX_BUFFERED_EVENTS
+        self.closed = False
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscription] = []
+
+    def subscribe(self) -> Subscription:
+        """Subscribe from a coroutine; a closed channel yields an already-ended subscription"""
+        subscription = Subscription(self, self.max_events)
+        with self._lock:
+            if self.closed:
+                subscription.end()
+            else:
+                self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def publish(self, event: str, data: Dict[str, any], droppable: bool = False):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(event, data, droppable)
+
+    def close(self):
+        """End every subscription after the events already published"""
+        with self._lock:
+            self.closed = True
+            subscribers = self._subscribers
+            self._subscribers = []
+        for subscription in subscribers:
+            subscription.end()
+
+def format_sse(event: str, data: Dict[str, any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def sse_stream(subscription: Subscription) -> AsyncIterator[str]:
+    """Server-sent-events body for a subscription, with comment lines to keep idle connections open"""
+    async for item in subscription.events(settings.SSE_KEEPALIVE_SECONDS):
+        if item is None:
+            yield ": keep-alive\n\n"
+        else:
+            yield format_sse(*item)
@@ -0,0 +1,144 @@
+import os
+from typing import Dict, List
+from sqlalchemy import delete, insert, update
+from ..core.config import settings
+from ..core.metrics import current_endpoint, stage_timer
+from ..db.database import SessionLocal
+from ..models.models import Document, DocumentPage
+from .job_queue import Job
+from .registry import services
+from .search_index import get_search_index
+import logging
+
+logger = logging.getLogger(__name__)
+
+def page_rows(document_id: int, text_content: List[Dict[str, any]]) -> List[Dict[str, any]]:
+    """DocumentPage rows for the page dicts produced by extract_text_from_pdf"""
+    return [
+        {
+            'document_id': document_id,
+            'page_number': page['page_number'],
+            'content': page['content'],
+            'ocr_used': page.get('ocr_used', False),
+            'char_count': len(page['content'])
+        }
+        for page in text_content
+    ]
+
+class PageWriter:
+    """Writes a document's pages to document_pages and the search index in batches.
+
+    The first flush replaces any pages from an earlier run. Each flush commits,
+    so a streamed document's pages are persisted as extraction goes and at most
+    one batch is held in memory.
+    """
+
+    def __init__(self, db, document_id: int, batch_size: int):
+        self.db = db
+        self.document_id = document_id
+        self.batch_size = batch_size
+        self.search_index = get_search_index()
+        self.pages = 0
+        self._rows = []
+        self._cleared = False
+
+    def add(self, page: Dict[str, any]):
+        self._rows.extend(page_rows(self.document_id, [page]))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._cleared:
+            self.search_index.remove_document(self.db, self.document_id)
+            self.db.execute(delete(DocumentPage).where(DocumentPage.document_id == self.document_id))
+            self._cleared = True
+        
+        if self._rows:
+            page_ids = self.db.scalars(
+                insert(DocumentPage).returning(DocumentPage.id, sort_by_parameter_order=True),
+                self._rows
+            ).all()
+            self.search_index.index_pages(self.db, [(page_id, row['content']) for page_id, row in zip(page_ids, self._rows)])
+            self.pages += len(self._rows)
+            self._rows = []
+        
+        with stage_timer("db_commit"):
+            self.db.commit()
+
+def mark_document_failed(document_id: int, error: str):
+    """Record a failed processing run on the Document row, in a session of its own"""
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(Document)
+            .where(Document.id == document_id)
+            .values(status='failed', error_message=error)
+        )
+        db.commit()
+    except Exception as e:
+        logger.error(f"Could not mark document {document_id} as failed: {str(e)}")
+    finally:
+        db.close()
+
+def process_uploaded_document(job: Job) -> Dict[str, any]:
+    """Job handler: extract an uploaded file and store the result on its Document row"""
+    document_id = job.payload['document_id']
+    file_path = job.payload['file_path']
+    current_endpoint.set(job.payload.get('endpoint', 'background'))
+    job.update_progress(document_id=document_id, stage='starting')
+
+    db = SessionLocal()
+    document_processor = services.document_processor()
+    try:
+        document = db.get(Document, document_id)
+        if document is None:
+            raise ValueError(f"Document {document_id} not found")
+
+        document.status = 'processing'
+        db.commit()
+
+        job.update_progress(stage='extracting')
+        page_writer = PageWriter(db, document_id, settings.STREAMING_PAGE_BATCH)
+        process_result = document_processor.process_document(
+            file_path=file_path,
+            object_name=job.payload['object_name'],
+            content_hash=job.payload.get('content_hash'),
+            on_page=lambda page: job.publish('page', {'document_id': document_id, **page}, droppable=True),
+            page_sink=page_writer.add
+        )
+
+        job.update_progress(stage='saving')
+        if process_result['status'] == 'success' and process_result['extraction_result']['status'] != 'success':
+            # A streamed extraction can fail part way, after some pages were written
+            process_result = process_result['extraction_result']
+        if process_result['status'] != 'success':
+            raise ValueError(process_result['error_message'])
+
+        extraction_result = process_result['extraction_result']
+        document.file_path = process_result['storage_path']
+        document.status = 'processed'
+        document.error_message = None
+        document.doc_metadata = extraction_result['metadata']
+        
+        # Replace any pages from an earlier run with the new extraction and index them for search;
+        # streamed documents have already written all but the last batch
+        for page in extraction_result['text_content']:
+            page_writer.add(page)
+        page_writer.flush()
+
+        job.update_progress(stage='done', pages=page_writer.pages)
+        return {'document_id': document_id, 'status': document.status}
+
+    except Exception as e:
+        # Whatever failed (extraction, a page flush, the database), the document must not stay
+        # 'processing'; the job's session may be unusable, so the failure is recorded in a new one
+        db.rollback()
+        mark_document_failed(document_id, str(e))
+        raise
+
+    finally:
+        db.close()
+
+        # Clean up temporary file
+        if os.path.exists(file_path):
+            os.remove(file_path)
@@ -0,0 +1,139 @@
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Optional, Dict
+from ..core.config import settings
+from .events import EventChannel
+import logging
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+class Job:
+    def __init__(self, handler: Callable[["Job"], Optional[Dict]], payload: Dict[str, any]):
+        self.id = str(uuid.uuid4())
+        self.handler = handler
+        self.payload = payload
+        self.status = 'queued'  # queued, processing, completed, failed
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.events = EventChannel()
+
+    def update_progress(self, **progress):
+        """Record progress reported by the handler while the job is running"""
+        self.progress.update(progress)
+        self.events.publish('progress', {'job_id': self.id, **self.progress})
+
+    def publish(self, event: str, data: Dict[str, any], droppable: bool = False):
+        """Stream an event to clients following this job without recording it"""
+        self.events.publish(event, {'job_id': self.id, **data}, droppable)
+
+    def to_dict(self) -> Dict[str, any]:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'progress': dict(self.progress),
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class LocalJobQueue:
+    """Bounded in-process job queue worked by a fixed pool of threads.
+
+    Stand-in for an external broker: jobs and their status live in this
+    process only, so status must be polled from the worker that accepted them.
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int, max_retained_jobs: int = 1000):
+        self.max_workers = max_workers
+        self.max_retained_jobs = max_retained_jobs
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def start(self):
+        if self._workers:
+            return
+        for index in range(self.max_workers):
+            worker = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info(f"Started job queue with {self.max_workers} workers")
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers after the jobs already queued have been processed"""
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        self._workers = []
+
+    def submit(self, handler: Callable[[Job], Optional[Dict]], **payload) -> Job:
+        """Queue handler(job) for execution, raising JobQueueFullError when at capacity"""
+        job = Job(handler, payload)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_retained_jobs:
+                self._jobs.popitem(last=False)
+
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise JobQueueFullError("Processing queue is full")
+
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            'workers': len(self._workers),
+            'queue_depth': self._queue.qsize(),
+            'processing': statuses.count('processing'),
+            'completed': statuses.count('completed'),
+            'failed': statuses.count('failed')
+        }
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            job.status = 'processing'
+            job.started_at = datetime.utcnow()
+            try:
+                job.result = job.handler(job)
+                job.status = 'completed'
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {str(e)}")
+                job.error = str(e)
+                job.status = 'failed'
+            finally:
+                job.finished_at = datetime.utcnow()
+                job.events.publish(job.status, job.to_dict())
+                job.events.close()
+
+job_queue = LocalJobQueue(
+    max_workers=settings.JOB_QUEUE_WORKERS,
+    max_queue_size=settings.JOB_QUEUE_MAX_SIZE
+)
@@ -1,121 +1,388 @@
-from typing import Dict, List, Optional
-from langchain.llms import OpenAI, Anthropic, Cohere
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
-import json
-from ..core.config import settings
-import logging
-
-logger = logging.getLogger(__name__)
-
-class LoanInfo(BaseModel):
-    loan_amount: float = Field(description="The total loan amount requested")
-    interest_rate: float = Field(description="The annual interest rate as a percentage")
-    tenure_months: int = Field(description="The loan tenure in months")
-    borrower_name: str = Field(description="The name of the borrower")
-    loan_purpose: str = Field(description="The stated purpose of the loan")
-    confidence_score: float = Field(description="Confidence score of the extraction (0-1)")
-
-class LoanProcessor:
-    def __init__(self, llm_provider: str = "openai"):
-        self.llm = self._initialize_llm(llm_provider)
-        self.output_parser = PydanticOutputParser(pydantic_object=LoanInfo)
-
-    def _initialize_llm(self, provider: str):
-        """Initialize the chosen LLM provider"""
-        if provider == "openai" and settings.OPENAI_API_KEY:
-            return OpenAI(temperature=0, model_name="gpt-4")
-        elif provider == "anthropic" and settings.ANTHROPIC_API_KEY:
-            return Anthropic(temperature=0)
-        elif provider == "cohere" and settings.COHERE_API_KEY:
-            return Cohere(temperature=0)
-        else:
-            raise ValueError(f"Invalid or unconfigured LLM provider: {provider}")
-
-    def create_extraction_prompt(self) -> PromptTemplate:
-        """Create the prompt template for loan information extraction"""
-        template = """
-        Extract the following information from the loan document text below. 
-        If a piece of information is not found, return null for that field.
-        
-        {format_instructions}
-        
-        Document Text:
-        {text}
-        
-        Extracted Information:
-        """
-        
-        return PromptTemplate(
-            template=template,
-            input_variables=["text"],
-            partial_variables={"format_instructions": self.output_parser.get_format_instructions()}
-        )
-
-    def extract_loan_info(self, text: str) -> Dict[str, any]:
-        """Extract loan information from document text using LangChain"""
-        try:
-            # Create the chain
-            prompt = self.create_extraction_prompt()
-            chain = LLMChain(llm=self.llm, prompt=prompt)
-            
-            # Run the chain
-            result = chain.run(text=text)
-            
-            # Parse the output
-            parsed_output = self.output_parser.parse(result)
-            
-            return {
-                'status': 'success',
-                'data': parsed_output.dict(),
-            }
-            
-        except Exception as e:
-            logger.error(f"Loan information extraction error: {str(e)}")
-            return {
-                'status': 'error',
-                'error_message': str(e)
-            }
-
-    def process_loan_application(self, document_texts: List[str]) -> Dict[str, any]:
-        """Process multiple documents for a loan application"""
-        try:
-            combined_text = "\n\n".join(document_texts)
-            extraction_result = self.extract_loan_info(combined_text)
-            
-            if extraction_result['status'] == 'success':
-                # Additional validation could be added here
-                return extraction_result
-            else:
-                raise Exception(extraction_result['error_message'])
-                
-        except Exception as e:
-            logger.error(f"Loan application processing error: {str(e)}")
-            return {
-                'status': 'error',
-                'error_message': str(e)
-            }
-
-    def validate_extraction(self, extracted_info: Dict[str, any]) -> bool:
-        """Validate the extracted loan information"""
-        try:
-            # Basic validation rules
-            if extracted_info['loan_amount'] <= 0:
-                return False
-            
-            if extracted_info['interest_rate'] <= 0 or extracted_info['interest_rate'] > 100:
-                return False
-            
-            if extracted_info['tenure_months'] <= 0:
-                return False
-            
-            if not extracted_info['borrower_name']:
-                return False
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Validation error: {str(e)}")
+import contextvars
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional
+from pydantic import BaseModel, Field
+import json
+from ..core.config import settings
+from ..core.metrics import observe_fast_path, observe_prompt, stage_timer
+from .cache import SQLiteCache
+from .page_ranker import RANKER_VERSION, select_pages
+from .rule_extractor import RULES_VERSION, rule_extractor
+import logging
+
+# langchain and its provider wrappers are imported when the first LoanProcessor
+# is built, so workers that only serve auth or health checks never load them
+if TYPE_CHECKING:
+    from langchain.prompts import PromptTemplate
+
+logger = logging.getLogger(__name__)
+
+class LoanInfo(BaseModel):
+    loan_amount: float = Field(description="The total loan amount requested")
+    interest_rate: float = Field(description="The annual interest rate as a percentage")
+    tenure_months: int = Field(description="The loan tenure in months")
+    borrower_name: str = Field(description="The name of the borrower")
+    loan_purpose: str = Field(description="The stated purpose of the loan")
+    confidence_score: float = Field(description="Confidence score of the extraction (0-1)")
+
+class PartialLoanInfo(BaseModel):
+    """LoanInfo extracted from one chunk of an application, where any field may be missing"""
+    loan_amount: Optional[float] = Field(None, description="The total loan amount requested")
+    interest_rate: Optional[float] = Field(None, description="The annual interest rate as a percentage")
+    tenure_months: Optional[int] = Field(None, description="The loan tenure in months")
+    borrower_name: Optional[str] = Field(None, description="The name of the borrower")
+    loan_purpose: Optional[str] = Field(None, description="The stated purpose of the loan")
+    confidence_score: float = Field(description="Confidence score of the extraction (0-1)")
+
+LOAN_INFO_FIELDS = [name for name in LoanInfo.__fields__ if name != "confidence_score"]
+
+# Bump whenever the extraction prompt changes so cached responses are not reused
+PROMPT_VERSION = 1
+
+# Rough characters-per-token ratio used when the LLM cannot count tokens itself
+CHARS_PER_TOKEN = 4
+
+def field_confidence(partial: Dict[str, any], field: str) -> float:
+    """Confidence of one field, preferring per-field scores kept from an earlier merge"""
+    confidences = partial.get('field_confidences') or {}
+    return confidences.get(field, partial.get('confidence_score') or 0)
+
+def merge_extractions(partials: List[Dict[str, any]]) -> Dict[str, any]:
+    """Merge partial extractions field by field, keeping the most confident non-null value.
+
+    The result records the confidence of each chosen field, so merged results
+    can themselves be merged again without diluting those scores.
+    """
+    merged = {}
+    field_confidences = {}
+    for field in LOAN_INFO_FIELDS:
+        candidates = [p for p in partials if p.get(field) not in (None, "")]
+        if not candidates:
+            continue
+        best = max(candidates, key=lambda p: field_confidence(p, field))
+        merged[field] = best[field]
+        field_confidences[field] = field_confidence(best, field)
+
+    merged['confidence_score'] = sum(field_confidences.values()) / len(LOAN_INFO_FIELDS)
+    merged['field_confidences'] = field_confidences
+    return merged
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> Optional[SQLiteCache]:
+    """Process-wide LLM response cache, or None when disabled"""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return SQLiteCache(
+        settings.LLM_CACHE_PATH,
+        settings.LLM_CACHE_MAX_BYTES,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS
+    )
+
+class LoanProcessor:
+    def __init__(self, llm_provider: str = "openai", llm=None):
+        from langchain.chains import LLMChain
+        from langchain.output_parsers import PydanticOutputParser
+        
+        # An explicit llm (e.g. langchain's FakeListLLM) bypasses provider setup for offline use
+        self.llm_provider = llm_provider
+        self.http_client = None
+        self.llm = llm if llm is not None else self._initialize_llm(llm_provider)
+        self.model_name = (
+            getattr(self.llm, "model_name", None)
+            or getattr(self.llm, "model", None)
+            or type(self.llm).__name__
+        )
+        self.output_parser = PydanticOutputParser(pydantic_object=LoanInfo)
+        self.partial_output_parser = PydanticOutputParser(pydantic_object=PartialLoanInfo)
+        
+        # Prompts and chains are built once and reused for every extraction
+        self.chains = {
+            partial: LLMChain(llm=self.llm, prompt=self.create_extraction_prompt(partial))
+            for partial in (False, True)
+        }
+
+    def _initialize_llm(self, provider: str):
+        """Initialize the chosen LLM provider"""
+        if provider == "openai" and settings.OPENAI_API_KEY:
+            import httpx
+            from langchain.chat_models import ChatOpenAI
+            # One pooled HTTP client per processor so connections to the provider are reused.
+            # gpt-4 is a chat model: langchain's completion OpenAI wrapper hands it to
+            # OpenAIChat, which has no http_client and would send the client as a parameter.
+            self.http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_CONNECTIONS
+                )
+            )
+            return ChatOpenAI(temperature=0, model_name="gpt-4", http_client=self.http_client)
+        # langchain's Anthropic and Cohere wrappers build their own SDK clients and take no
+        # HTTP client, so their connections are pooled by those SDKs rather than here
+        elif provider == "anthropic" and settings.ANTHROPIC_API_KEY:
+            from langchain.llms import Anthropic
+            return Anthropic(temperature=0)
+        elif provider == "cohere" and settings.COHERE_API_KEY:
+            from langchain.llms import Cohere
+            return Cohere(temperature=0)
+        else:
+            raise ValueError(f"Invalid or unconfigured LLM provider: {provider}")
+
+    def close(self):
+        """Close the pooled HTTP client, if this processor created one"""
+        if self.http_client is not None:
+            self.http_client.close()
+            self.http_client = None
+
+    def create_extraction_prompt(self, partial: bool = False) -> "PromptTemplate":
+        """Create the prompt template for loan information extraction"""
+        from langchain.prompts import PromptTemplate
+        template = """
+        Extract the following information from the loan document text below. 
+        If a piece of information is not found, return null for that field.
+        
+        {format_instructions}
+        
+        Document Text:
+        {text}
+        
+        Extracted Information:
+        """
+        
+        output_parser = self.partial_output_parser if partial else self.output_parser
+        return PromptTemplate(
+            template=template,
+            input_variables=["text"],
+            partial_variables={"format_instructions": output_parser.get_format_instructions()}
+        )
+
+    def response_cache_key(self, text: str, partial: bool = False) -> str:
+        """Cache key for an LLM response, versioned by provider, model and prompt"""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        prompt_kind = "partial" if partial else "full"
+        return f"{self.llm_provider}:{self.model_name}:p{PROMPT_VERSION}-{prompt_kind}:{text_hash}"
+
+    def extract_with_rules(self, text: str, partial: bool = False) -> Optional[Dict[str, any]]:
+        """Rule-based extraction result, or None when the LLM is needed"""
+        if not settings.FAST_PATH_ENABLED:
+            return None
+        
+        with stage_timer("rules"):
+            extraction = rule_extractor.extract(text)
+        hit = extraction['complete'] and extraction['confidence_score'] >= settings.FAST_PATH_MIN_CONFIDENCE
+        rule_extractor.record(hit)
+        observe_fast_path(hit)
+        if not hit:
+            return None
+        
+        if partial:
+            data = PartialLoanInfo(**extraction['data'], confidence_score=extraction['confidence_score']).dict()
+            data['field_confidences'] = extraction['field_confidences']
+        else:
+            # loan_purpose is not required for the fast path and is left empty when not found
+            fields = {'loan_purpose': "", **extraction['data']}
+            data = LoanInfo(**fields, confidence_score=extraction['confidence_score']).dict()
+        
+        return {
+            'status': 'success',
+            'data': data,
+            'cache_hit': False,
+            'source': 'rules'
+        }
+
+    def extract_loan_info(self, text: str, partial: bool = False, use_rules: bool = True) -> Dict[str, any]:
+        """Extract loan information from document text, trying the rule-based fast path before the LLM"""
+        try:
+            if use_rules:
+                fast_path_result = self.extract_with_rules(text, partial)
+                if fast_path_result is not None:
+                    return fast_path_result
+            
+            cache = get_llm_cache()
+            cache_key = self.response_cache_key(text, partial)
+            cached = cache.get(cache_key) if cache is not None else None
+            
+            # Run the chain unless an identical request was answered before
+            if cached is not None:
+                result = cached.decode("utf-8")
+            else:
+                outcome = "error"
+                try:
+                    with stage_timer("llm"):
+                        result = self.chains[partial].run(text=text)
+                    outcome = "success"
+                finally:
+                    observe_prompt(len(text), outcome)
+            
+            # Parse the output
+            output_parser = self.partial_output_parser if partial else self.output_parser
+            parsed_output = output_parser.parse(result)
+            
+            # Only cache responses that parse, so a malformed answer is retried next time
+            if cache is not None and cached is None:
+                cache.set(cache_key, result.encode("utf-8"))
+            
+            return {
+                'status': 'success',
+                'data': parsed_output.dict(),
+                'cache_hit': cached is not None,
+                'source': 'llm'
+            }
+            
+        except Exception as e:
+            logger.error(f"Loan information extraction error: {str(e)}")
+            return {
+                'status': 'error',
+                'error_message': str(e)
+            }
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens with the LLM's tokenizer, falling back to a character estimate"""
+        try:
+            return self.llm.get_num_tokens(text)
+        except Exception:
+            return len(text) // CHARS_PER_TOKEN + 1
+
+    def split_into_chunks(self, document_texts: List[str], max_tokens: int) -> List[str]:
+        """Pack page texts into chunks of at most max_tokens, splitting oversized pages"""
+        pieces = []
+        for text in document_texts:
+            if self.count_tokens(text) <= max_tokens:
+                pieces.append(text)
+                continue
+            
+            # Split oversized pages on paragraphs, then hard-split what is still too long
+            for paragraph in text.split("\n\n"):
+                if self.count_tokens(paragraph) <= max_tokens:
+                    pieces.append(paragraph)
+                else:
+                    step = max_tokens * CHARS_PER_TOKEN
+                    pieces.extend(paragraph[i:i + step] for i in range(0, len(paragraph), step))
+        
+        chunks = []
+        current = []
+        current_tokens = 0
+        for piece in pieces:
+            piece_tokens = self.count_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += piece_tokens
+        
+        if current:
+            chunks.append("\n\n".join(current))
+        
+        return chunks
+
+    def select_relevant_pages(self, page_texts: List[str]) -> List[str]:
+        """Pages of one document most likely to hold loan fields, within the per-document token budget"""
+        if not settings.PAGE_SELECTION_ENABLED:
+            return page_texts
+        
+        with stage_timer("page_selection"):
+            return select_pages(
+                page_texts,
+                settings.PAGE_SELECTION_TOKEN_BUDGET,
+                self.count_tokens,
+                settings.PAGE_SELECTION_MIN_SCORE
+            )
+
+    def extract_partials(self, chunks: List[str]) -> Dict[str, any]:
+        """Extract partial loan information from each chunk concurrently and merge the results.
+
+        Callers try the fast path on the whole text first, so chunks go straight to the LLM.
+        """
+        if len(chunks) == 1:
+            results = [self.extract_loan_info(chunks[0], partial=True, use_rules=False)]
+        else:
+            with ThreadPoolExecutor(max_workers=settings.LLM_MAX_CONCURRENCY) as executor:
+                # Each call runs in its own copy of this context so its metrics keep the caller's endpoint
+                futures = [
+                    executor.submit(contextvars.copy_context().run, self.extract_loan_info, chunk, True, False)
+                    for chunk in chunks
+                ]
+                results = [future.result() for future in futures]
+        
+        partials = [result['data'] for result in results if result['status'] == 'success']
+        if not partials:
+            return {
+                'status': 'error',
+                'error_message': results[0]['error_message'] if results else "No text to process"
+            }
+        
+        return {
+            'status': 'success',
+            'data': merge_extractions(partials),
+            'chunks': len(chunks)
+        }
+
+    def complete_extraction(self, partials: List[Dict[str, any]]) -> Dict[str, any]:
+        """Merge partial extractions into a LoanInfo, failing if required fields are missing"""
+        try:
+            merged = LoanInfo(**merge_extractions(partials))
+        except Exception as e:
+            return {
+                'status': 'error',
+                'error_message': f"Incomplete extraction across {len(partials)} parts: {str(e)}"
+            }
+        
+        return {
+            'status': 'success',
+            'data': merged.dict()
+        }
+
+    def extract_document_info(self, page_texts: List[str]) -> Dict[str, any]:
+        """Extract whichever loan fields a single document contains"""
+        fast_path_result = self.extract_with_rules("\n\n".join(page_texts), partial=True)
+        if fast_path_result is not None:
+            return fast_path_result
+        
+        # Only the pages most likely to hold loan fields are sent to the LLM, in
+        # chunks that fit the context window unless chunking is turned off
+        page_texts = self.select_relevant_pages(page_texts)
+        if settings.LLM_CHUNKING_ENABLED:
+            chunks = self.split_into_chunks(page_texts, settings.LLM_CHUNK_TOKENS)
+        else:
+            chunks = ["\n\n".join(page_texts)] if page_texts else []
+        if not chunks:
+            return {'status': 'error', 'error_message': "No text to extract from"}
+        return self.extract_partials(chunks)
+
+    def document_fingerprint(self, content_key: str) -> str:
+        """Identifies everything a document's extraction depends on, so unchanged results can be reused"""
+        inputs = [
+            content_key,
+            self.llm_provider,
+            str(self.model_name),
+            str(PROMPT_VERSION),
+            f"chunks{settings.LLM_CHUNKING_ENABLED}-{settings.LLM_CHUNK_TOKENS}",
+            f"rules{RULES_VERSION}-{settings.FAST_PATH_ENABLED}-{settings.FAST_PATH_MIN_CONFIDENCE}",
+            f"pages{RANKER_VERSION}-{settings.PAGE_SELECTION_ENABLED}-"
+            f"{settings.PAGE_SELECTION_TOKEN_BUDGET}-{settings.PAGE_SELECTION_MIN_SCORE}"
+        ]
+        return hashlib.sha256("|".join(inputs).encode("utf-8")).hexdigest()
+
+    def validate_extraction(self, extracted_info: Dict[str, any]) -> bool:
+        """Validate the extracted loan information"""
+        try:
+            # Basic validation rules
+            if extracted_info['loan_amount'] <= 0:
+                return False
+            
+            if extracted_info['interest_rate'] <= 0 or extracted_info['interest_rate'] > 100:
+                return False
+            
+            if extracted_info['tenure_months'] <= 0:
+                return False
+            
+            if not extracted_info['borrower_name']:
+                return False
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Validation error: {str(e)}")
             return False 
\ No newline at end of file
@@ -0,0 +1,144 @@
+from typing import TYPE_CHECKING, List, Tuple
+from ..core.config import settings
+import logging
+
+if TYPE_CHECKING:
+    from pypdf import PageObject
+
+logger = logging.getLogger(__name__)
+
+# Resolution a scanner is assumed to use at minimum, for estimating image coverage from pixel
+# counts when the content stream cannot be read
+SCAN_DPI = 100
+POINTS_PER_INCH = 72
+
+# PDF transformation matrices as (a, b, c, d, e, f)
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+# Reasons recorded per page; the first three mean the page is OCR'd
+SCANNED_IMAGE = "scanned_image"
+SPARSE_TEXT_OVER_IMAGE = "sparse_text_over_image"
+UNEXTRACTABLE_TEXT = "unextractable_text"
+TEXT_LAYER = "text_layer"
+NO_CONTENT = "no_content"
+
+def _resolve(obj):
+    return obj.get_object() if hasattr(obj, "get_object") else obj
+
+def _image_pixels(resources, depth: int = 0) -> int:
+    """Total pixel area of the image XObjects a page draws, including those inside form XObjects"""
+    xobjects = _resolve((resources or {}).get("/XObject")) or {}
+    pixels = 0
+    for xobject in xobjects.values():
+        xobject = _resolve(xobject)
+        subtype = xobject.get("/Subtype")
+        if subtype == "/Image":
+            pixels += int(xobject.get("/Width", 0)) * int(xobject.get("/Height", 0))
+        elif subtype == "/Form" and depth < 2:
+            pixels += _image_pixels(_resolve(xobject.get("/Resources")), depth + 1)
+    return pixels
+
+def _multiply(m: Tuple[float, ...], n: Tuple[float, ...]) -> Tuple[float, ...]:
+    """Matrix applying m, then n"""
+    return (
+        m[0] * n[0] + m[1] * n[2],
+        m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2],
+        m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4],
+        m[4] * n[1] + m[5] * n[3] + n[5],
+    )
+
+def _drawn_area(ctm: Tuple[float, ...], box: Tuple[float, float, float, float]) -> float:
+    """Area of the page box covered by an image, which PDF draws into the unit square mapped by ctm"""
+    a, b, c, d, e, f = ctm
+    xs = (e, a + e, c + e, a + c + e)
+    ys = (f, b + f, d + f, b + d + f)
+    width = min(max(xs), box[2]) - max(min(xs), box[0])
+    height = min(max(ys), box[3]) - max(min(ys), box[1])
+    return width * height if width > 0 and height > 0 else 0.0
+
+def _image_area(
+    operations: List[Tuple[list, bytes]],
+    resources,
+    pdf,
+    ctm: Tuple[float, ...],
+    box: Tuple[float, float, float, float],
+    depth: int = 0
+) -> float:
+    """Page area covered by the images a content stream draws, following its q/Q, cm and Do operators"""
+    from pypdf.generic import ContentStream
+    xobjects = _resolve((resources or {}).get("/XObject")) or {}
+    area = 0.0
+    saved = []
+    for operands, operator in operations:
+        if operator == b"q":
+            saved.append(ctm)
+        elif operator == b"Q":
+            if saved:
+                ctm = saved.pop()
+        elif operator == b"cm":
+            ctm = _multiply(tuple(float(value) for value in operands), ctm)
+        elif operator == b"INLINE IMAGE":
+            area += _drawn_area(ctm, box)
+        elif operator == b"Do":
+            xobject = _resolve(xobjects.get(operands[0]))
+            subtype = xobject.get("/Subtype") if xobject is not None else None
+            if subtype == "/Image":
+                area += _drawn_area(ctm, box)
+            elif subtype == "/Form" and depth < 2:
+                matrix = tuple(float(value) for value in xobject.get("/Matrix", IDENTITY))
+                form_resources = _resolve(xobject.get("/Resources")) or resources
+                area += _image_area(
+                    ContentStream(xobject, pdf).operations, form_resources, pdf, _multiply(matrix, ctm), box, depth + 1
+                )
+    return area
+
+def image_coverage(page: "PageObject", resources) -> float:
+    """Share of the page covered by the images it draws, from where they are placed rather than their resolution.
+
+    A high-resolution logo or signature drawn in a corner covers little of the
+    page however many pixels it has.
+    """
+    mediabox = page.mediabox
+    box = (float(mediabox.left), float(mediabox.bottom), float(mediabox.right), float(mediabox.top))
+    page_area = (box[2] - box[0]) * (box[3] - box[1])
+    pixels = _image_pixels(resources)
+    if not page_area or not pixels:
+        return 0.0
+    try:
+        contents = page.get_contents()
+        area = _image_area(contents.operations, resources, page.pdf, IDENTITY, box) if contents is not None else 0.0
+    except Exception as e:
+        # Fall back to the pixel count at the minimum scan resolution
+        logger.debug(f"Could not read image placement from the content stream: {str(e)}")
+        return pixels / (page_area / POINTS_PER_INCH ** 2 * SCAN_DPI ** 2)
+    # Overlapping images are counted once per image
+    return min(1.0, area / page_area)
+
+def classify_page(page: "PageObject", text: str) -> Tuple[bool, str]:
+    """Decide from the page's resources and extracted text whether it needs OCR.
+
+    Only looks at the page dictionary and, for pages with images, where its
+    content stream draws them; never renders, so it costs far less than
+    rasterizing. Returns (needs_ocr, reason).
+    """
+    resources = _resolve(page.get("/Resources")) or {}
+    has_fonts = bool(_resolve(resources.get("/Font")))
+    chars = len(text.strip())
+
+    page_inches = float(page.mediabox.width) * float(page.mediabox.height) / POINTS_PER_INCH ** 2
+    image_dominated = image_coverage(page, resources) >= settings.OCR_SCAN_MIN_COVERAGE
+
+    if image_dominated and chars < settings.OCR_TEXT_THRESHOLD:
+        return True, SCANNED_IMAGE
+    if image_dominated and chars / page_inches < settings.OCR_MIN_TEXT_DENSITY:
+        # e.g. a scan with only a stamp or header in its text layer
+        return True, SPARSE_TEXT_OVER_IMAGE
+    if chars:
+        # Short pages with a real text layer (signature pages, cover sheets) are kept as they are
+        return False, TEXT_LAYER
+    if has_fonts:
+        # Text is drawn but pypdf cannot map its glyphs back to characters
+        return True, UNEXTRACTABLE_TEXT
+    return False, NO_CONTENT
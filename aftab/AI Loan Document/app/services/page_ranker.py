@@ -0,0 +1,106 @@
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, List
+
+# Bump whenever scoring changes so stored per-document results are re-extracted
+RANKER_VERSION = 1
+
+# Terms that signal each LoanInfo field; multi-word phrases count as one term
+FIELD_TERMS: Dict[str, List[str]] = {
+    'loan_amount': ["loan amount", "sanctioned amount", "principal", "sanction", "amount"],
+    'interest_rate': ["interest rate", "rate of interest", "per annum", "roi", "apr", "interest"],
+    'tenure_months': ["tenure", "tenor", "repayment period", "months", "years", "instalments", "emi"],
+    'borrower_name': ["borrower name", "applicant name", "borrower", "applicant", "dear"],
+    'loan_purpose': ["purpose of loan", "loan purpose", "purpose"],
+}
+
+# Value shapes that make a page more likely to hold the field itself rather than just mention it
+VALUE_PATTERNS: Dict[str, re.Pattern] = {
+    'loan_amount': re.compile(r"(?:rs\.?|inr|usd|\$|₹)\s*\d[\d,]*", re.I),
+    'interest_rate': re.compile(r"\d{1,2}(?:\.\d+)?\s*%"),
+    'tenure_months': re.compile(r"\b\d{1,3}\s*(?:months?|years?)\b", re.I),
+}
+
+WORD = re.compile(r"[a-z]+")
+NUMERIC_LINE = re.compile(r"^[\W\d]*\d[\W\d]*\d[\W\d]*$")
+
+def _term_counts(text: str) -> Counter:
+    lowered = text.lower()
+    words = WORD.findall(lowered)
+    counts = Counter(words)
+    joined = " ".join(words)
+    for terms in FIELD_TERMS.values():
+        for term in terms:
+            if " " in term:
+                counts[term] = joined.count(term)
+    return counts
+
+def _noise_penalty(text: str) -> float:
+    """Share of lines that are number-only (transaction tables) or have almost no letters (OCR noise)"""
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return 1.0
+    noisy = 0
+    for line in lines:
+        letters = sum(char.isalpha() for char in line)
+        if NUMERIC_LINE.match(line) or letters < len(line.strip()) * 0.3:
+            noisy += 1
+    return noisy / len(lines)
+
+def score_pages(page_texts: List[str]) -> List[float]:
+    """TF-IDF-style relevance of each page to the LoanInfo fields.
+
+    Each field scores its best term on the page (log term frequency times
+    inverse page frequency across the given pages), plus a bonus when a value
+    of the right shape appears. Field scores are summed, so pages covering
+    several fields rank first, and scaled down by the page's share of noisy lines.
+    """
+    counts = [_term_counts(text) for text in page_texts]
+    page_count = len(page_texts)
+    document_frequency = Counter()
+    for page_counts in counts:
+        document_frequency.update(term for term, count in page_counts.items() if count)
+
+    scores = []
+    for text, page_counts in zip(page_texts, counts):
+        score = 0.0
+        for field, terms in FIELD_TERMS.items():
+            best = 0.0
+            for term in terms:
+                frequency = page_counts.get(term, 0)
+                if frequency:
+                    idf = math.log((page_count + 1) / (document_frequency[term] + 1)) + 1
+                    best = max(best, (1 + math.log(frequency)) * idf)
+            if best and field in VALUE_PATTERNS and VALUE_PATTERNS[field].search(text):
+                best *= 1.5
+            score += best
+        scores.append(score * (1 - _noise_penalty(text)))
+    return scores
+
+def select_pages(
+    page_texts: List[str],
+    token_budget: int,
+    count_tokens: Callable[[str], int],
+    min_score: float = 0.0
+) -> List[str]:
+    """Highest-scoring pages that fit in token_budget, returned in their original order.
+
+    The best page is always kept, even when it alone exceeds the budget.
+    """
+    if not page_texts:
+        return []
+
+    scores = score_pages(page_texts)
+    ranked = sorted(range(len(page_texts)), key=lambda index: (-scores[index], index))
+    selected = []
+    used_tokens = 0
+    for index in ranked:
+        if selected and scores[index] <= min_score:
+            break
+        tokens = count_tokens(page_texts[index])
+        if selected and used_tokens + tokens > token_budget:
+            continue
+        selected.append(index)
+        used_tokens += tokens
+    return [page_texts[index] for index in sorted(selected)]
@@ -0,0 +1,71 @@
+import importlib
+import threading
+import time
+from typing import Dict
+from .document_processor import DocumentProcessor
+from .loan_processor import LoanProcessor
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Libraries the services import on first use; warm_up loads them ahead of the first request
+WARMUP_MODULES = (
+    "pypdf",
+    "pdf2image",
+    "pytesseract",
+    "PIL.Image",
+    "magic",
+    "langchain.chains",
+    "langchain.chat_models",
+    "langchain.llms",
+    "langchain.output_parsers",
+    "langchain.prompts",
+)
+
+class ServiceRegistry:
+    """Application-lifetime service instances shared by all requests and workers.
+
+    Instances are created on first use and hold their pooled S3 and LLM
+    connections until close() is called from the app lifespan.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._document_processor = None
+        self._loan_processors: Dict[str, LoanProcessor] = {}
+
+    def document_processor(self) -> DocumentProcessor:
+        with self._lock:
+            if self._document_processor is None:
+                self._document_processor = DocumentProcessor()
+            return self._document_processor
+
+    def loan_processor(self, llm_provider: str = "openai") -> LoanProcessor:
+        with self._lock:
+            if llm_provider not in self._loan_processors:
+                self._loan_processors[llm_provider] = LoanProcessor(llm_provider)
+            return self._loan_processors[llm_provider]
+
+    def warm_up(self):
+        """Import the heavy libraries and build the default services, so the first upload does not pay for it"""
+        start = time.perf_counter()
+        for module in WARMUP_MODULES:
+            importlib.import_module(module)
+        self.document_processor()
+        try:
+            self.loan_processor()
+        except ValueError as e:
+            logger.warning(f"Skipped LLM warm-up: {str(e)}")
+        logger.info(f"Warmed up shared services in {time.perf_counter() - start:.2f}s")
+
+    def close(self):
+        with self._lock:
+            if self._document_processor is not None:
+                self._document_processor.close()
+                self._document_processor = None
+            for loan_processor in self._loan_processors.values():
+                loan_processor.close()
+            self._loan_processors.clear()
+        logger.info("Closed shared services")
+
+services = ServiceRegistry()
@@ -0,0 +1,122 @@
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+# Bump whenever the patterns change so stored per-document results are re-extracted
+RULES_VERSION = 1
+
+# Fields that must all be found before a rule-based result can stand in for the LLM
+REQUIRED_FIELDS = ["loan_amount", "interest_rate", "tenure_months", "borrower_name"]
+
+CURRENCY = r"(?:rs\.?|inr|usd|\$|₹)?\s*"
+AMOUNT = r"(\d{1,3}(?:,\d{2,3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)"
+NAME = r"((?-i:[A-Z][A-Za-z.'-]*(?: [A-Z][A-Za-z.'-]*){0,4}))"  # capitalised words only
+
+# (pattern, confidence) per field, strongest phrasing first
+FIELD_PATTERNS: Dict[str, List[Tuple[Pattern, float]]] = {
+    'loan_amount': [
+        (re.compile(rf"(?:loan|sanctioned|principal)\s+amount\s*(?:of|:|is|-)?\s*{CURRENCY}{AMOUNT}", re.I), 0.95),
+        (re.compile(rf"\b(?:a|the)\s+(?:term\s+|home\s+|personal\s+)?loan\s+of\s+{CURRENCY}{AMOUNT}", re.I), 0.85),
+    ],
+    'interest_rate': [
+        (re.compile(r"(?:rate\s+of\s+interest|interest\s+rate|\broi\b)\s*(?:of|:|is|@|-)?\s*(\d{1,2}(?:\.\d+)?)\s*%", re.I), 0.95),
+        (re.compile(r"@\s*(\d{1,2}(?:\.\d+)?)\s*%\s*(?:p\.?\s?a\.?|per\s+annum)", re.I), 0.85),
+    ],
+    'tenure_months': [
+        (re.compile(r"(?:loan\s+)?(?:tenure|tenor|term|repayment\s+period)\s*(?:of|:|is|-)?\s*(\d{1,3})\s*(months?|years?)\b", re.I), 0.95),
+        (re.compile(r"\b(\d{1,3})\s*(?:equated\s+)?(?:monthly\s+)?(instalments|installments|emis)\b", re.I), 0.8),
+    ],
+    'borrower_name': [
+        (re.compile(rf"(?:borrower(?:'s)?\s+name|name\s+of\s+(?:the\s+)?borrower|applicant(?:'s)?\s+name)\s*[:\-]\s*{NAME}", re.I), 0.95),
+        (re.compile(rf"^\s*dear\s+(?:mr|mrs|ms|dr)\.?\s+{NAME}\s*,?\s*$", re.I | re.M), 0.8),
+    ],
+    'loan_purpose': [
+        (re.compile(r"(?:purpose\s+of\s+(?:the\s+)?loan|loan\s+purpose|purpose)\s*[:\-]\s*([^\n]{3,100})", re.I), 0.9),
+    ],
+}
+
+def _to_months(match: re.Match) -> Optional[int]:
+    value = int(match.group(1))
+    unit = match.group(2).lower()
+    return value * 12 if unit.startswith("year") else value
+
+CONVERTERS: Dict[str, Callable[[re.Match], Any]] = {
+    'loan_amount': lambda match: float(match.group(1).replace(",", "")),
+    'interest_rate': lambda match: float(match.group(1)),
+    'tenure_months': _to_months,
+    'borrower_name': lambda match: match.group(1).strip(),
+    'loan_purpose': lambda match: match.group(1).strip().rstrip("."),
+}
+
+# Values outside these ranges are treated as misreads rather than extractions
+VALIDATORS: Dict[str, Callable[[Any], bool]] = {
+    'loan_amount': lambda value: value > 0,
+    'interest_rate': lambda value: 0 < value <= 100,
+    'tenure_months': lambda value: 0 < value <= 600,
+    'borrower_name': lambda value: len(value) >= 3,
+    'loan_purpose': lambda value: bool(value),
+}
+
+class RuleExtractor:
+    """Regex extractor for the fixed phrasing of standard sanction letters and application forms.
+
+    Runs before the LLM; its result is used only when every required field is
+    found with enough confidence, otherwise the LLM is called as before.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Fields found in text with a confidence for each and for the result as a whole"""
+        data = {}
+        field_confidences = {}
+        for field, patterns in FIELD_PATTERNS.items():
+            values = []
+            best_confidence = 0.0
+            for pattern, confidence in patterns:
+                for match in pattern.finditer(text):
+                    try:
+                        value = CONVERTERS[field](match)
+                    except (ValueError, IndexError):
+                        continue
+                    if not VALIDATORS[field](value):
+                        continue
+                    if not values:
+                        best_confidence = confidence
+                    values.append(value)
+            if not values:
+                continue
+            data[field] = values[0]
+            # Conflicting values (e.g. a requested and a sanctioned amount) halve the confidence
+            distinct = {str(value).lower() for value in values}
+            field_confidences[field] = best_confidence if len(distinct) == 1 else best_confidence / 2
+
+        found = [field_confidences[field] for field in REQUIRED_FIELDS if field in field_confidences]
+        confidence = sum(found) / len(REQUIRED_FIELDS)
+        return {
+            'data': data,
+            'field_confidences': field_confidences,
+            'confidence_score': round(confidence, 3),
+            'complete': len(found) == len(REQUIRED_FIELDS)
+        }
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+rule_extractor = RuleExtractor()
@@ -0,0 +1,186 @@
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.elements import TextClause
+from ..core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_CHARS = 200
+
+def application_filter_clause(params: Dict[str, any], loan_application_id: Optional[int]) -> str:
+    """Optional loan application filter for search statements, adding its bind parameter"""
+    if not loan_application_id:
+        return ""
+    params['loan_application_id'] = loan_application_id
+    return "AND d.loan_application_id = :loan_application_id"
+
+def owner_filter_clause(params: Dict[str, any], owner_id: Optional[int]) -> str:
+    """Optional document owner filter for search statements, adding its bind parameter"""
+    if owner_id is None:
+        return ""
+    params['owner_id'] = owner_id
+    return "AND d.user_id = :owner_id"
+
+class SearchIndex(ABC):
+    """Full-text index over document_pages.
+
+    Pages are indexed explicitly by the upload path (index_pages) rather than
+    by triggers, so the index works the same whether or not page content is
+    stored compressed.
+    """
+
+    @abstractmethod
+    def ensure_schema(self, conn):
+        """Create the index structures if they do not exist yet"""
+
+    @abstractmethod
+    def unindexed_statement(self, after_id: int, limit: int) -> TextClause:
+        """Ids of pages not yet in the index, in id order after after_id.
+
+        Rebuilds read the content through the ORM and call index_pages, since
+        SQL cannot read page content that is stored compressed.
+        """
+
+    @abstractmethod
+    def index_pages(self, db, pages: List[Tuple[int, str]]):
+        """Index (page_id, content) pairs in the caller's transaction"""
+
+    def remove_document(self, db, document_id: int):
+        """Drop a document's pages from the index before they are deleted"""
+
+    @abstractmethod
+    def search_statement(
+        self,
+        query: str,
+        limit: int,
+        offset: int,
+        loan_application_id: Optional[int] = None,
+        owner_id: Optional[int] = None
+    ) -> TextClause:
+        """Ranked page hits as (page_id, document_id, page_number, filename, loan_application_id, rank).
+
+        With an owner_id, only that user's documents are searched.
+        """
+
+class PostgresSearchIndex(SearchIndex):
+    """tsvector column on document_pages with a GIN index"""
+
+    def ensure_schema(self, conn):
+        conn.execute(text("ALTER TABLE document_pages ADD COLUMN IF NOT EXISTS content_tsv tsvector"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_document_pages_content_tsv "
+            "ON document_pages USING GIN (content_tsv)"
+        ))
+
+    def unindexed_statement(self, after_id, limit):
+        return text(
+            "SELECT id FROM document_pages WHERE content_tsv IS NULL AND id > :after_id "
+            "ORDER BY id LIMIT :limit"
+        ).bindparams(after_id=after_id, limit=limit)
+
+    def index_pages(self, db, pages: List[Tuple[int, str]]):
+        if not pages:
+            return
+        db.execute(
+            text("UPDATE document_pages SET content_tsv = to_tsvector('english', :content) WHERE id = :id"),
+            [{'id': page_id, 'content': content} for page_id, content in pages]
+        )
+
+    def search_statement(self, query, limit, offset, loan_application_id=None, owner_id=None):
+        params = {'query': query, 'limit': limit, 'offset': offset}
+        application_filter = application_filter_clause(params, loan_application_id)
+        owner_filter = owner_filter_clause(params, owner_id)
+        return text(f"""
+            SELECT p.id AS page_id, p.document_id, p.page_number, d.filename, d.loan_application_id,
+                   ts_rank_cd(p.content_tsv, q) AS rank
+            FROM document_pages p
+            JOIN documents d ON d.id = p.document_id,
+                 websearch_to_tsquery('english', :query) q
+            WHERE p.content_tsv @@ q {application_filter} {owner_filter}
+            ORDER BY rank DESC, p.id
+            LIMIT :limit OFFSET :offset
+        """).bindparams(**params)
+
+class SQLiteSearchIndex(SearchIndex):
+    """FTS5 virtual table keyed by document_pages.id, for local development and tests"""
+
+    def ensure_schema(self, conn):
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS document_pages_fts "
+            "USING fts5(content, tokenize='porter unicode61')"
+        ))
+
+    def unindexed_statement(self, after_id, limit):
+        return text(
+            "SELECT id FROM document_pages "
+            "WHERE id NOT IN (SELECT rowid FROM document_pages_fts) AND id > :after_id "
+            "ORDER BY id LIMIT :limit"
+        ).bindparams(after_id=after_id, limit=limit)
+
+    def index_pages(self, db, pages: List[Tuple[int, str]]):
+        if not pages:
+            return
+        db.execute(
+            text("INSERT OR REPLACE INTO document_pages_fts (rowid, content) VALUES (:id, :content)"),
+            [{'id': page_id, 'content': content} for page_id, content in pages]
+        )
+
+    def remove_document(self, db, document_id: int):
+        db.execute(
+            text(
+                "DELETE FROM document_pages_fts WHERE rowid IN "
+                "(SELECT id FROM document_pages WHERE document_id = :document_id)"
+            ),
+            {'document_id': document_id}
+        )
+
+    def search_statement(self, query, limit, offset, loan_application_id=None, owner_id=None):
+        # Quote each term so user input cannot use FTS5 query syntax
+        fts_query = " ".join(f'"{term}"' for term in query_terms(query))
+        params = {'query': fts_query, 'limit': limit, 'offset': offset}
+        application_filter = application_filter_clause(params, loan_application_id)
+        owner_filter = owner_filter_clause(params, owner_id)
+        return text(f"""
+            SELECT p.id AS page_id, p.document_id, p.page_number, d.filename, d.loan_application_id,
+                   -bm25(document_pages_fts) AS rank
+            FROM document_pages_fts
+            JOIN document_pages p ON p.id = document_pages_fts.rowid
+            JOIN documents d ON d.id = p.document_id
+            WHERE document_pages_fts MATCH :query {application_filter} {owner_filter}
+            ORDER BY rank DESC, p.id
+            LIMIT :limit OFFSET :offset
+        """).bindparams(**params)
+
+def query_terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())
+
+def make_snippet(content: str, query: str, width: int = SNIPPET_CHARS) -> str:
+    """Window of page text around the first matching query term"""
+    lowered = content.lower()
+    positions = [lowered.find(term) for term in query_terms(query)]
+    positions = [position for position in positions if position >= 0]
+    start = max(0, min(positions) - width // 4) if positions else 0
+    snippet = content[start:start + width].strip()
+    if start > 0:
+        snippet = "..." + snippet
+    if start + width < len(content):
+        snippet += "..."
+    return snippet
+
+SEARCH_INDEXES: Dict[str, type] = {
+    "postgresql": PostgresSearchIndex,
+    "sqlite": SQLiteSearchIndex,
+}
+
+@lru_cache(maxsize=1)
+def get_search_index() -> SearchIndex:
+    """Search index implementation for the configured database"""
+    backend = make_url(settings.DATABASE_URL).get_backend_name()
+    if backend not in SEARCH_INDEXES:
+        raise ValueError(f"Full-text search is not supported on {backend}")
+    return SEARCH_INDEXES[backend]()
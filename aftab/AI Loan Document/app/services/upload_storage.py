@@ -0,0 +1,60 @@
+import os
+import hashlib
+from typing import Dict
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from ..core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class UploadRejectedError(ValueError):
+    """Raised when an upload fails type or size validation while streaming"""
+
+async def save_upload_stream(file: UploadFile, file_path: str) -> Dict[str, any]:
+    """Copy an upload to disk in fixed-size chunks, validating as it goes.
+
+    Starlette has already received the request body into its own spooled
+    temporary file before the handler runs, so this cannot stop a client
+    from sending a large body; requests over MAX_UPLOAD_REQUEST_SIZE are
+    refused earlier from their Content-Length. What it does bound is the
+    copy: the MIME type is sniffed from the first chunk and the copy stops
+    as soon as the file exceeds MAX_FILE_SIZE, holding one chunk in memory.
+    """
+    import magic
+    digest = hashlib.sha256()
+    size = 0
+    mime_type = None
+
+    try:
+        with open(file_path, "wb") as buffer:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                if mime_type is None:
+                    mime_type = magic.from_buffer(chunk, mime=True)
+                    if mime_type not in settings.ALLOWED_FILE_TYPES:
+                        raise UploadRejectedError(f"Invalid file type: {mime_type}")
+
+                size += len(chunk)
+                if size > settings.MAX_FILE_SIZE:
+                    raise UploadRejectedError(f"File too large: exceeds {settings.MAX_FILE_SIZE} bytes")
+
+                digest.update(chunk)
+                await run_in_threadpool(buffer.write, chunk)
+
+        if size == 0:
+            raise UploadRejectedError("Empty file")
+
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+    return {
+        'file_size': size,
+        'content_hash': digest.hexdigest(),
+        'mime_type': mime_type
+    }
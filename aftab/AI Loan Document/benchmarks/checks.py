@@ -0,0 +1,216 @@
+"""Offline checks of pipeline behaviour the benchmarks rely on, for CI.
+
+    python -m benchmarks.checks
+    python -m benchmarks.checks --only chunked_extraction
+
+No LLM provider, database server or S3 bucket is needed: extraction uses the
+DeterministicLLM, uploads go to a fake S3 client, and documents and the
+SQLite database are created in a scratch directory. The s3_overlap check OCRs
+scanned pages, so it needs poppler and tesseract like the app does. Each check
+prints PASS or FAIL with its measurements; the exit status is 1 when any check
+fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import traceback
+from typing import Callable, Dict
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_ROOT not in sys.path:
+    sys.path.insert(0, APP_ROOT)
+
+from benchmarks.corpus import labelled_sample
+from benchmarks.run import configure_environment, field_accuracy
+
+# Two synthetic pages per chunk, so a 12-page document needs several without splitting a page
+CHECK_CHUNK_TOKENS = 1500
+
+def check_chunked_extraction() -> Dict[str, any]:
+    """A document too long for one chunk is extracted over several LLM calls with every field found"""
+    from app.core.config import settings
+    from benchmarks.fake_llm import BenchmarkLoanProcessor
+
+    loan_processor = BenchmarkLoanProcessor()
+    doc = labelled_sample([12], documents_per_count=1)[0]
+    chunks = loan_processor.split_into_chunks(doc['pages'], settings.LLM_CHUNK_TOKENS)
+    result = loan_processor.extract_document_info(doc['pages'])
+
+    assert len(chunks) > 1, f"expected several chunks, got {len(chunks)}"
+    assert result['status'] == 'success', result.get('error_message')
+    assert loan_processor.llm.calls == len(chunks), f"{loan_processor.llm.calls} LLM calls for {len(chunks)} chunks"
+    accuracy = field_accuracy(result['data'], doc['terms'])
+    assert accuracy == 1.0, f"field accuracy {accuracy:.0%}: {result['data']}"
+    return {'chunks': len(chunks), 'llm_calls': loan_processor.llm.calls, 'field_accuracy': accuracy}
+
+class SlowS3Client:
+    """Stands in for a boto3 S3 client: records uploads and takes a fixed time for each"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.uploads = []
+
+    def upload_file(self, file_path: str, bucket: str, object_name: str, Config=None):
+        start = time.perf_counter()
+        time.sleep(self.seconds)
+        self.uploads.append({'file_path': file_path, 'object_name': object_name, 'start': start, 'end': time.perf_counter()})
+
+def check_s3_overlap() -> Dict[str, any]:
+    """process_document uploads to S3 while text is extracted, not before or after it"""
+    from benchmarks.corpus import generate_corpus
+    from app.services.document_processor import DocumentProcessor
+
+    corpus_dir = tempfile.mkdtemp(prefix="checks-corpus-")
+    doc = generate_corpus(corpus_dir, [4], ["mixed"])[0]
+    s3_client = SlowS3Client(seconds=0.5)
+    processor = DocumentProcessor(ocr_workers=1, s3_client=s3_client)
+    extraction = {}
+    extract_text_cached = processor.extract_text_cached
+
+    def timed_extract(*args, **kwargs):
+        extraction['start'] = time.perf_counter()
+        try:
+            return extract_text_cached(*args, **kwargs)
+        finally:
+            extraction['end'] = time.perf_counter()
+
+    processor.extract_text_cached = timed_extract
+    try:
+        start = time.perf_counter()
+        result = processor.process_document(doc['path'], "checks/mixed-4p.pdf")
+        wall = time.perf_counter() - start
+    finally:
+        processor.close()
+
+    assert result['status'] == 'success', result.get('error_message')
+    # An extraction that failed fast would overlap the upload without proving anything
+    extraction_result = result['extraction_result']
+    assert extraction_result['status'] == 'success', extraction_result.get('error_message')
+    extracted_pages = [page for page in extraction_result['text_content'] if page['content']]
+    assert len(extracted_pages) == doc['pages'], f"text extracted from {len(extracted_pages)} of {doc['pages']} pages"
+    assert result['storage_path'].endswith("/checks/mixed-4p.pdf"), result['storage_path']
+    assert len(s3_client.uploads) == 1, f"{len(s3_client.uploads)} uploads"
+    upload = s3_client.uploads[0]
+    assert upload['file_path'] == doc['path']
+    overlap = min(upload['end'], extraction['end']) - max(upload['start'], extraction['start'])
+    assert overlap > 0, "the upload did not run while text was extracted"
+    return {
+        'upload_seconds': upload['end'] - upload['start'],
+        'extract_seconds': extraction['end'] - extraction['start'],
+        'overlap_seconds': overlap,
+        'wall_seconds': wall,
+        'pages_extracted': len(extracted_pages)
+    }
+
+# Who asks for the owner's document in the access check, and their role
+ACCESS_USERS = {'owner': "customer", 'other': "customer", 'agent': "agent"}
+
+def found(response) -> bool:
+    """Whether a document endpoint returned the document, as opposed to a 404"""
+    assert response.status_code in (200, 404), f"{response.url}: HTTP {response.status_code} {response.text}"
+    return response.status_code == 200
+
+def check_document_access() -> Dict[str, any]:
+    """A customer cannot read another customer's document through any document endpoint; staff can"""
+    from fastapi.testclient import TestClient
+    from app.api.deps import get_current_user
+    from app.db.database import SessionLocal
+    from app.db.init_db import init_db
+    from app.main import app
+    from app.models.models import Document, DocumentPage, LoanApplication, User
+    from app.services.search_index import get_search_index
+
+    init_db()
+    db = SessionLocal()
+    try:
+        users = {name: User(email=f"{name}@example.com", role=role, is_active=True) for name, role in ACCESS_USERS.items()}
+        db.add_all(users.values())
+        db.flush()
+        application = LoanApplication(user_id=users["owner"].id, status='pending', processing_status='new')
+        db.add(application)
+        db.flush()
+        document = Document(
+            filename="statement.pdf",
+            status='processed',
+            user_id=users["owner"].id,
+            loan_application_id=application.id,
+            pages=[DocumentPage(page_number=1, content="Borrower Name: Ada Lovelace", char_count=27)]
+        )
+        db.add(document)
+        db.flush()
+        get_search_index().index_pages(db, [(page.id, page.content) for page in document.pages])
+        user_ids = {name: user.id for name, user in users.items()}
+        document_id = document.id
+        application_id = application.id
+        db.commit()
+    finally:
+        db.close()
+
+    prefix = "/api/v1/documents"
+    probes = {
+        'document': lambda: found(client.get(f"{prefix}/documents/{document_id}")),
+        'pages': lambda: found(client.get(f"{prefix}/documents/{document_id}/pages")),
+        'listing': lambda: any(
+            item['id'] == document_id and item['pages']
+            for item in client.get(
+                f"{prefix}/loan-application/{application_id}/documents", params={'include_text': True}
+            ).json()['items']
+        ),
+        'search': lambda: any(
+            hit['document_id'] == document_id
+            for hit in client.get(f"{prefix}/search", params={'q': "Lovelace"}).json()['results']
+        ),
+    }
+    visible = {}
+    current = {}
+    app.dependency_overrides[get_current_user] = lambda: current['user']
+    try:
+        with TestClient(app) as client:
+            for name, user_id in user_ids.items():
+                current['user'] = User(id=user_id, email=f"{name}@example.com", role=ACCESS_USERS[name], is_active=True)
+                visible[name] = {probe: run() for probe, run in probes.items()}
+    finally:
+        app.dependency_overrides.clear()
+
+    for name, should_see in (("owner", True), ("other", False), ("agent", True)):
+        wrong = [probe for probe, seen in visible[name].items() if seen != should_see]
+        assert not wrong, f"{name} {'cannot' if should_see else 'can'} read the document through: {', '.join(wrong)}"
+    return visible
+
+CHECKS: Dict[str, Callable[[], Dict[str, any]]] = {
+    'chunked_extraction': check_chunked_extraction,
+    's3_overlap': check_s3_overlap,
+    'document_access': check_document_access,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="comma-separated subset of " + ", ".join(CHECKS))
+    args = parser.parse_args()
+    names = [name for name in args.only.split(",") if name] if args.only else list(CHECKS)
+    unknown = set(names) - set(CHECKS)
+    if unknown:
+        raise SystemExit(f"Unknown checks: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="checks-")
+    # Everything goes to the LLM in small chunks, so chunking is what is exercised
+    os.environ["LLM_CHUNK_TOKENS"] = str(CHECK_CHUNK_TOKENS)
+    os.environ["LLM_CHUNKING_ENABLED"] = "true"
+    os.environ["S3_BUCKET_NAME"] = "checks"
+    configure_environment(workdir, with_cache=False, fast_path=False, page_selection=False)
+
+    failures = 0
+    for name in names:
+        try:
+            measurements = CHECKS[name]()
+        except Exception:
+            failures += 1
+            print(f"FAIL {name}\n{traceback.format_exc()}", file=sys.stderr)
+        else:
+            print(f"PASS {name} {measurements}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Compare two benchmark result files: python -m benchmarks.compare baseline.json results.json"""
+import json
+import sys
+from typing import Dict, Optional
+
+METRICS = [
+    ('pages/s', lambda result: result.get('pages_per_second'), True),
+    ('p50 s', lambda result: result.get('latency_seconds', {}).get('p50'), False),
+    ('p95 s', lambda result: result.get('latency_seconds', {}).get('p95'), False),
+    ('p99 s', lambda result: result.get('latency_seconds', {}).get('p99'), False),
+    ('rss MB', lambda result: result.get('peak_rss_mb', {}).get('self'), False),
+]
+
+def change(baseline: Optional[float], current: Optional[float], higher_is_better: bool) -> str:
+    if not baseline or current is None:
+        return "n/a"
+    delta = (current - baseline) / baseline * 100
+    better = delta > 0 if higher_is_better else delta < 0
+    return f"{delta:+.1f}%{' (better)' if better and abs(delta) >= 1 else ''}"
+
+def compare(baseline: Dict[str, any], current: Dict[str, any]):
+    print(f"baseline {baseline['meta'].get('git_commit', '?')[:10]}  current {current['meta'].get('git_commit', '?')[:10]}")
+    for scenario, result in current['scenarios'].items():
+        base = baseline['scenarios'].get(scenario)
+        if base is None or 'error' in base or 'error' in result:
+            print(f"\n{scenario}: not comparable")
+            continue
+        print(f"\n{scenario}")
+        for label, metric, higher_is_better in METRICS:
+            before, after = metric(base), metric(result)
+            print(f"  {label:<8} {before or 0:>10.3f} -> {after or 0:>10.3f}  {change(before, after, higher_is_better)}")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        raise SystemExit(__doc__)
+    with open(sys.argv[1]) as f:
+        baseline = json.load(f)
+    with open(sys.argv[2]) as f:
+        current = json.load(f)
+    compare(baseline, current)
@@ -0,0 +1,93 @@
+"""Compare codecs for stored page text: size on disk and compress/decompress speed.
+
+    python -m benchmarks.compression
+    python -m benchmarks.compression --sample pages.json --dictionary-size 65536
+
+A sample file is a JSON list of page texts, e.g. exported from document_pages.
+Without one, pages are generated from the synthetic corpus. Dictionaries are
+trained on half of the pages and measured on the other half, as they would
+be on pages stored after training.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_ROOT not in sys.path:
+    sys.path.insert(0, APP_ROOT)
+
+from app.services.compression import compress, decompress, train_dictionary
+from benchmarks.corpus import loan_terms, page_lines
+
+def synthetic_pages(documents: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    pages = []
+    for _ in range(documents):
+        terms = loan_terms(rng)
+        page_count = rng.randint(1, 10)
+        pages += ["\n".join(page_lines(rng, terms, page_number, page_count)) for page_number in range(1, page_count + 1)]
+    return pages
+
+def measure(pages: List[bytes], codec: str, level: int, dictionary: Optional[bytes]) -> Dict[str, float]:
+    start = time.perf_counter()
+    payloads = [compress(page, codec, level, dictionary) for page in pages]
+    compress_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for payload in payloads:
+        decompress(payload, codec, dictionary)
+    decompress_seconds = time.perf_counter() - start
+
+    raw_bytes = sum(len(page) for page in pages)
+    stored_bytes = sum(len(payload) for payload in payloads)
+    return {
+        'dictionary_bytes': len(dictionary) if dictionary else 0,
+        'stored_bytes': stored_bytes,
+        'ratio': stored_bytes / raw_bytes if raw_bytes else 1.0,
+        'compress_mb_per_second': raw_bytes / compress_seconds / 1e6 if compress_seconds else 0.0,
+        'decompress_mb_per_second': raw_bytes / decompress_seconds / 1e6 if decompress_seconds else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", help="JSON list of page texts; synthetic pages are generated when omitted")
+    parser.add_argument("--documents", type=int, default=300, help="synthetic documents")
+    parser.add_argument("--level", type=int, default=6)
+    parser.add_argument("--dictionary-size", type=int, default=32 * 1024)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.sample:
+        with open(args.sample) as f:
+            pages = json.load(f)
+    else:
+        pages = synthetic_pages(args.documents, args.seed)
+    training, measured = pages[::2], pages[1::2]
+    measured_bytes = [page.encode("utf-8") for page in measured]
+
+    codecs = ["zlib"]
+    if importlib.util.find_spec("zstandard"):
+        codecs.append("zstd")
+    else:
+        print("zstandard is not installed; measuring zlib only", file=sys.stderr)
+
+    results = {}
+    for codec in codecs:
+        dictionary = train_dictionary(training, codec, args.dictionary_size)
+        results[codec] = measure(measured_bytes, codec, args.level, None)
+        results[f"{codec}+dictionary"] = measure(measured_bytes, codec, args.level, dictionary)
+
+    print(json.dumps({
+        'pages': len(measured),
+        'raw_bytes': sum(len(page) for page in measured_bytes),
+        'mean_page_bytes': sum(len(page) for page in measured_bytes) / len(measured_bytes) if measured_bytes else 0,
+        'codecs': results
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
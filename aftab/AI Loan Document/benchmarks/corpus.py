@@ -0,0 +1,211 @@
+import io
+import os
+import random
+from typing import Dict, List
+from PIL import Image, ImageDraw, ImageFont
+
+# US letter at 72 points per inch
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+SCAN_DPI = 150
+LINES_PER_PAGE = 40
+
+PAGE_KINDS = ("text", "scanned", "mixed")
+
+FIRST_NAMES = ["Aisha", "Rahul", "Maria", "John", "Wei", "Fatima", "Carlos", "Priya", "David", "Sara"]
+LAST_NAMES = ["Khan", "Sharma", "Garcia", "Smith", "Chen", "Ali", "Lopez", "Patel", "Brown", "Nair"]
+PURPOSES = ["home purchase", "debt consolidation", "vehicle purchase", "business expansion", "education"]
+BOILERPLATE = (
+    "TERMS AND CONDITIONS. The lender may vary the charges by notice. Prepayment is permitted "
+    "subject to the fee schedule. Any dispute shall be referred to arbitration. The borrower "
+    "shall keep the security insured and shall not create any further charge over it."
+).split()
+FILLER = (
+    "The borrower agrees to repay the principal together with interest in equal monthly "
+    "instalments. Late payments attract a penalty as set out in the schedule of charges. "
+    "This agreement is governed by the laws of the jurisdiction in which it was executed."
+).split()
+
+def loan_terms(rng: random.Random) -> Dict[str, any]:
+    """Ground-truth loan fields for one synthetic application"""
+    return {
+        'borrower_name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        'loan_amount': float(rng.randrange(5000, 500000, 500)),
+        'interest_rate': round(rng.uniform(3, 18), 2),
+        'tenure_months': rng.choice([12, 24, 36, 60, 120, 240, 360]),
+        'loan_purpose': rng.choice(PURPOSES)
+    }
+
+def page_lines(rng: random.Random, terms: Dict[str, any], page_number: int, page_count: int = 1) -> List[str]:
+    """Lines of one page.
+
+    The first page holds amount, rate and borrower; the last page holds tenure
+    and purpose (all five on a single-page document). Pages in between are
+    bank-statement tables, terms-and-conditions boilerplate or filler prose,
+    none of which carry loan fields.
+    """
+    lines = [f"LOAN APPLICATION - PAGE {page_number}"]
+    if page_number == 1:
+        lines += [
+            f"Borrower Name: {terms['borrower_name']}",
+            f"Loan Amount: ${terms['loan_amount']:,.2f}",
+            f"Interest Rate: {terms['interest_rate']}%",
+        ]
+    if page_number == page_count:
+        lines += [
+            f"Tenure: {terms['tenure_months']} months",
+            f"Purpose of Loan: {terms['loan_purpose']}",
+        ]
+
+    filler = rng.choice(["statement", "boilerplate", "prose"]) if 1 < page_number < page_count else "prose"
+    while len(lines) < LINES_PER_PAGE:
+        if filler == "statement":
+            lines.append(
+                f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2023  {rng.randint(100000, 999999)}  "
+                f"{rng.randint(10, 99999):>8}.{rng.randint(0, 99):02d}  {rng.randint(1000, 999999):>9}.{rng.randint(0, 99):02d}"
+            )
+        elif filler == "boilerplate":
+            lines.append(" ".join(rng.choice(BOILERPLATE) for _ in range(12)))
+        else:
+            lines.append(" ".join(rng.choice(FILLER) for _ in range(12)))
+    return lines
+
+def _pdf_string(text: str) -> str:
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+def _text_stream(lines: List[str]) -> bytes:
+    ops = ["BT", "/F1 10 Tf", "14 TL", f"50 {PAGE_HEIGHT - 60} Td"]
+    for line in lines:
+        ops.append(f"{_pdf_string(line)} Tj T*")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+def _load_font(size: int):
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+def _scanned_image(lines: List[str]) -> bytes:
+    """Grayscale JPEG of the page as a scanner would produce it"""
+    scale = SCAN_DPI / 72
+    image = Image.new("L", (int(PAGE_WIDTH * scale), int(PAGE_HEIGHT * scale)), 255)
+    draw = ImageDraw.Draw(image)
+    font = _load_font(int(10 * scale))
+    y = 60 * scale
+    for line in lines:
+        draw.text((50 * scale, y), line, fill=0, font=font)
+        y += 14 * scale
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=75)
+    return buffer.getvalue()
+
+def build_pdf(pages: List[Dict[str, any]]) -> bytes:
+    """Minimal PDF with one text-layer or image-only page per entry of pages.
+
+    Written by hand rather than with a PDF library so the corpus needs
+    nothing beyond Pillow and is byte-for-byte reproducible.
+    """
+    objects = []  # object bodies; object n is objects[n - 1]
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")
+    pages_id = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for page in pages:
+        resources = f"/Font << /F1 {font} 0 R >>"
+        if page['kind'] == "scanned":
+            jpeg = _scanned_image(page['lines'])
+            width, height = Image.open(io.BytesIO(jpeg)).size
+            image = add(
+                f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /DCTDecode "
+                f"/Length {len(jpeg)} >>\nstream\n".encode("latin-1") + jpeg + b"\nendstream"
+            )
+            resources = f"/XObject << /Im1 {image} 0 R >>"
+            stream = f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im1 Do Q".encode("latin-1")
+        else:
+            stream = _text_stream(page['lines'])
+        content = add(f"<< /Length {len(stream)} >>\nstream\n".encode("latin-1") + stream + b"\nendstream")
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << {resources} >> /Contents {content} 0 R >>".encode("latin-1")
+        ))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode("latin-1")
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+    info = add(b"<< /Title (Synthetic loan application) /Author (benchmarks) >>")
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n")
+    xref = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+    output.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R /Info {info} 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n".encode("latin-1")
+    )
+    return output.getvalue()
+
+def page_kind(kind: str, page_number: int) -> str:
+    """Mixed documents alternate text and scanned pages, starting with text"""
+    if kind == "mixed":
+        return "text" if page_number % 2 else "scanned"
+    return kind
+
+def generate_corpus(
+    output_dir: str,
+    page_counts: List[int],
+    kinds: List[str] = PAGE_KINDS,
+    seed: int = 0
+) -> List[Dict[str, any]]:
+    """Write one PDF per (kind, page count) and return their descriptions with ground truth"""
+    os.makedirs(output_dir, exist_ok=True)
+    corpus = []
+    for kind in kinds:
+        if kind not in PAGE_KINDS:
+            raise ValueError(f"Unknown page kind: {kind}")
+        for page_count in page_counts:
+            rng = random.Random(f"{seed}:{kind}:{page_count}")
+            terms = loan_terms(rng)
+            pages = [
+                {'kind': page_kind(kind, number), 'lines': page_lines(rng, terms, number, page_count)}
+                for number in range(1, page_count + 1)
+            ]
+            path = os.path.join(output_dir, f"{kind}-{page_count}p.pdf")
+            with open(path, "wb") as f:
+                f.write(build_pdf(pages))
+            corpus.append({
+                'name': f"{kind}-{page_count}p",
+                'path': path,
+                'kind': kind,
+                'pages': page_count,
+                'scanned_pages': sum(page['kind'] == "scanned" for page in pages),
+                'terms': terms
+            })
+    return corpus
+
+def labelled_sample(page_counts: List[int], documents_per_count: int = 10, seed: int = 0) -> List[Dict[str, any]]:
+    """Page texts with their ground-truth loan terms, without rendering PDFs"""
+    sample = []
+    for page_count in page_counts:
+        for index in range(documents_per_count):
+            rng = random.Random(f"{seed}:sample:{page_count}:{index}")
+            terms = loan_terms(rng)
+            sample.append({
+                'name': f"sample-{page_count}p-{index}",
+                'pages': ["\n".join(page_lines(rng, terms, number, page_count)) for number in range(1, page_count + 1)],
+                'terms': terms
+            })
+    return sample
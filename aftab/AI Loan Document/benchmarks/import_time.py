@@ -0,0 +1,112 @@
+"""Measure how long `import app.main` takes and which packages it loads.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 5 --max-ms 1500 --output import_time.json
+
+Each run is a fresh interpreter started with `-X importtime`. The report
+gives the median total and the packages that cost the most. The exit status
+is 1 when a library that should be imported lazily (PDF, OCR, S3, LLM) is
+loaded at startup, or when --max-ms is exceeded, so CI can run this as a check.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages only document processing and LLM extraction need
+LAZY_PACKAGES = ("pypdf", "pdf2image", "pytesseract", "PIL", "boto3", "botocore", "magic", "langchain")
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+def parse_importtime(stderr: str) -> List[Dict[str, any]]:
+    """Rows of `-X importtime` output as {'module', 'self_us', 'cumulative_us', 'depth'}"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            rows.append({
+                'module': match.group(4),
+                'self_us': int(match.group(1)),
+                'cumulative_us': int(match.group(2)),
+                'depth': (len(match.group(3)) - 1) // 2
+            })
+    return rows
+
+def measure(module: str, env: Dict[str, str]) -> List[Dict[str, any]]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+def package_totals(rows: List[Dict[str, any]]) -> Dict[str, float]:
+    """Self time per top-level package in milliseconds, most expensive first"""
+    totals = defaultdict(int)
+    for row in rows:
+        totals[row['module'].split(".")[0]] += row['self_us']
+    return {
+        package: self_us / 1000
+        for package, self_us in sorted(totals.items(), key=lambda item: -item[1])
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters to time; the median is reported")
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    parser.add_argument("--max-ms", type=float, help="fail when the median import time exceeds this")
+    parser.add_argument("--output", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="import-time-") as workdir:
+        # Same scratch settings as benchmarks.run, so no database driver or credentials are needed
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.sqlite3')}"
+        env.pop("ASYNC_DATABASE_URL", None)
+        env["AWS_ACCESS_KEY_ID"] = ""
+        runs = [measure(args.module, env) for _ in range(max(1, args.repeat))]
+
+    totals_ms = [sum(row['self_us'] for row in rows) / 1000 for rows in runs]
+    median_ms = statistics.median(totals_ms)
+    rows = runs[totals_ms.index(sorted(totals_ms)[len(totals_ms) // 2])]
+    packages = package_totals(rows)
+    eager = sorted(package for package in packages if package in LAZY_PACKAGES)
+
+    report = {
+        'module': args.module,
+        'python': sys.version.split()[0],
+        'runs_ms': totals_ms,
+        'median_ms': median_ms,
+        'modules_imported': len(rows),
+        'top_packages_ms': dict(list(packages.items())[:args.top]),
+        'eager_heavy_packages': eager
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    if eager:
+        failures.append(f"imported at startup but should be lazy: {', '.join(eager)}")
+    if args.max_ms is not None and median_ms > args.max_ms:
+        failures.append(f"median import time {median_ms:.0f} ms exceeds {args.max_ms:.0f} ms")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""Benchmarks for the document and loan pipelines.
+
+Run from the project root:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.compare baseline.json results.json
+
+Each scenario runs in its own process against a fresh SQLite database, so
+peak RSS is per scenario. Caches are off unless --with-cache is given.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_ROOT not in sys.path:
+    sys.path.insert(0, APP_ROOT)
+
+from benchmarks.corpus import PAGE_KINDS, generate_corpus
+
+SCENARIOS = ("extract", "upload", "process")
+JOB_TIMEOUT_SECONDS = 600
+
+def configure_environment(workdir: str, with_cache: bool, fast_path: bool, page_selection: bool):
+    """Point settings at a scratch SQLite database and directories; must run before app imports"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.sqlite3')}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["AWS_ACCESS_KEY_ID"] = ""  # no S3 upload
+    os.environ["EXTRACTION_CACHE_ENABLED"] = str(with_cache).lower()
+    os.environ["LLM_CACHE_ENABLED"] = str(with_cache).lower()
+    os.environ["FAST_PATH_ENABLED"] = str(fast_path).lower()
+    os.environ["PAGE_SELECTION_ENABLED"] = str(page_selection).lower()
+    os.chdir(workdir)  # UPLOAD_FOLDER and cache paths are relative
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linearly interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered) if ordered else 0.0,
+        'p50': percentile(ordered, 0.50),
+        'p95': percentile(ordered, 0.95),
+        'p99': percentile(ordered, 0.99),
+        'max': ordered[-1] if ordered else 0.0
+    }
+
+def peak_rss_mb() -> Dict[str, float]:
+    """High-water RSS of this process and of its reaped children (OCR workers, poppler, tesseract)"""
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor
+    }
+
+def scenario_result(latencies: List[float], pages: int, wall_seconds: float, **extra) -> Dict[str, any]:
+    result = {
+        'pages': pages,
+        'wall_seconds': wall_seconds,
+        'pages_per_second': pages / wall_seconds if wall_seconds else 0.0,
+        'latency_seconds': latency_summary(latencies)
+    }
+    result.update(extra)
+    return result
+
+def run_extract(corpus: List[Dict[str, any]], args) -> Dict[str, any]:
+    """DocumentProcessor.extract_text_from_pdf over every corpus file"""
+    from app.services.document_processor import DocumentProcessor
+
+    processor = DocumentProcessor()
+    latencies = []
+    by_document = {doc['name']: [] for doc in corpus}
+    pages = 0
+    failures = 0
+    try:
+        # Warm up the OCR pool so process start-up is not billed to the first document
+        processor.extract_text_from_pdf(corpus[0]['path'])
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for doc in corpus:
+                begin = time.perf_counter()
+                result = processor.extract_text_from_pdf(doc['path'])
+                elapsed = time.perf_counter() - begin
+                latencies.append(elapsed)
+                by_document[doc['name']].append(elapsed)
+                pages += doc['pages']
+                failures += result['status'] != 'success'
+        wall = time.perf_counter() - start
+    finally:
+        processor.close()
+
+    return scenario_result(
+        latencies, pages, wall,
+        failures=failures,
+        documents={name: latency_summary(values) for name, values in by_document.items()}
+    )
+
+def wait_for_jobs(job_ids: List[str]) -> List[any]:
+    from app.services.job_queue import job_queue
+
+    deadline = time.monotonic() + JOB_TIMEOUT_SECONDS
+    jobs = [job_queue.get(job_id) for job_id in job_ids]
+    while any(job.status in ('queued', 'processing') for job in jobs):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Jobs still running after {JOB_TIMEOUT_SECONDS}s")
+        time.sleep(0.01)
+    return jobs
+
+def benchmark_client(args):
+    """TestClient for the app with auth bypassed and the deterministic LLM installed"""
+    from fastapi.testclient import TestClient
+    from app.api.deps import get_current_user, get_loan_processor
+    from app.db.init_db import init_db
+    from app.main import app
+    from app.models.models import User
+    from benchmarks.fake_llm import BenchmarkLoanProcessor
+
+    init_db()
+    user = User(id=1, email="benchmark@example.com", role="admin", is_active=True)
+    loan_processor = BenchmarkLoanProcessor(
+        latency_seconds=args.llm_latency,
+        seconds_per_1k_chars=args.llm_seconds_per_1k_chars
+    )
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_loan_processor] = lambda: loan_processor
+    return TestClient(app), loan_processor
+
+def upload(client, doc: Dict[str, any], loan_application_id: int = None) -> Dict[str, any]:
+    with open(doc['path'], "rb") as f:
+        response = client.post(
+            "/api/v1/documents/upload/",
+            params={'loan_application_id': loan_application_id} if loan_application_id else None,
+            files=[("files", (os.path.basename(doc['path']), f, "application/pdf"))]
+        )
+    response.raise_for_status()
+    return response.json()['results'][0]
+
+def run_upload(corpus: List[Dict[str, any]], args) -> Dict[str, any]:
+    """upload_documents request latency, then end-to-end ingestion throughput of the job queue"""
+    request_latencies = []
+    job_ids = []
+    pages = 0
+    client, _ = benchmark_client(args)
+    with client:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for doc in corpus:
+                begin = time.perf_counter()
+                result = upload(client, doc)
+                request_latencies.append(time.perf_counter() - begin)
+                if result.get('job_id'):
+                    job_ids.append(result['job_id'])
+                    pages += doc['pages']
+        jobs = wait_for_jobs(job_ids)
+        wall = time.perf_counter() - start
+
+    job_latencies = [(job.finished_at - job.created_at).total_seconds() for job in jobs]
+    return scenario_result(
+        request_latencies, pages, wall,
+        rejected=len(corpus) * args.repeat - len(job_ids),
+        failures=sum(job.status == 'failed' for job in jobs),
+        job_latency_seconds=latency_summary(job_latencies)
+    )
+
+def field_accuracy(extracted: Dict[str, any], terms: Dict[str, any]) -> float:
+    """Share of ground-truth loan fields the extraction got right"""
+    correct = 0
+    for field, expected in terms.items():
+        value = extracted.get(field)
+        if isinstance(expected, float):
+            correct += value is not None and abs(float(value) - expected) < 0.01
+        else:
+            correct += str(value).strip().lower() == str(expected).lower()
+    return correct / len(terms)
+
+def run_process(corpus: List[Dict[str, any]], args) -> Dict[str, any]:
+    """process_loan_documents with force=true (full extraction) and without (all documents reused)"""
+    from app.db.database import SessionLocal
+    from app.models.models import LoanApplication
+    from app.services.rule_extractor import rule_extractor
+
+    client, loan_processor = benchmark_client(args)
+    with client:
+        # One application per corpus file, ingested before timing starts
+        applications = []
+        db = SessionLocal()
+        try:
+            for doc in corpus:
+                application = LoanApplication(user_id=1, status='pending', processing_status='new')
+                db.add(application)
+                db.commit()
+                applications.append((application.id, doc))
+        finally:
+            db.close()
+        wait_for_jobs([upload(client, doc, application_id)['job_id'] for application_id, doc in applications])
+
+        latencies = []
+        reuse_latencies = []
+        accuracies = []
+        pages = 0
+        failures = 0
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for application_id, doc in applications:
+                begin = time.perf_counter()
+                response = client.post(f"/api/v1/documents/process/{application_id}", params={'force': True})
+                latencies.append(time.perf_counter() - begin)
+                pages += doc['pages']
+                if response.status_code == 200:
+                    accuracies.append(field_accuracy(response.json()['extracted_data'], doc['terms']))
+                else:
+                    failures += 1
+        wall = time.perf_counter() - start
+
+        for application_id, _ in applications:
+            begin = time.perf_counter()
+            client.post(f"/api/v1/documents/process/{application_id}")
+            reuse_latencies.append(time.perf_counter() - begin)
+
+    return scenario_result(
+        latencies, pages, wall,
+        failures=failures,
+        field_accuracy=sum(accuracies) / len(accuracies) if accuracies else 0.0,
+        reuse_latency_seconds=latency_summary(reuse_latencies),
+        fast_path=rule_extractor.stats(),
+        llm={
+            'calls': loan_processor.llm.calls,
+            'prompt_characters': loan_processor.llm.prompt_characters
+        }
+    )
+
+SCENARIO_RUNNERS: Dict[str, Callable] = {
+    'extract': run_extract,
+    'upload': run_upload,
+    'process': run_process,
+}
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=APP_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def run_scenario_in_process(scenario: str, args) -> Dict[str, any]:
+    with open(os.path.join(args.corpus_dir, "corpus.json")) as f:
+        corpus = json.load(f)
+    workdir = tempfile.mkdtemp(prefix=f"benchmark-{scenario}-")
+    configure_environment(workdir, args.with_cache, not args.no_fast_path, not args.no_page_selection)
+    result = SCENARIO_RUNNERS[scenario](corpus, args)
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+def run_scenario_isolated(scenario: str, args) -> Dict[str, any]:
+    """Run one scenario in a fresh interpreter so its memory and imports are its own"""
+    command = [
+        sys.executable, "-m", "benchmarks.run",
+        "--child", "--scenarios", scenario,
+        "--corpus-dir", args.corpus_dir,
+        "--repeat", str(args.repeat),
+        "--llm-latency", str(args.llm_latency),
+        "--llm-seconds-per-1k-chars", str(args.llm_seconds_per_1k_chars),
+    ]
+    if args.with_cache:
+        command.append("--with-cache")
+    if args.no_fast_path:
+        command.append("--no-fast-path")
+    if args.no_page_selection:
+        command.append("--no-page-selection")
+    completed = subprocess.run(command, cwd=APP_ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr)
+        return {'error': f"scenario exited with status {completed.returncode}"}
+    # Anything the app prints goes before the result line
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--page-counts", default="1,5,20", help="pages per generated document")
+    parser.add_argument("--kinds", default=",".join(PAGE_KINDS), help="page kinds: " + ", ".join(PAGE_KINDS))
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="simulated seconds per LLM call")
+    parser.add_argument("--llm-seconds-per-1k-chars", type=float, default=0.0, help="simulated LLM cost per 1k prompt characters")
+    parser.add_argument("--with-cache", action="store_true", help="leave the extraction and LLM caches enabled")
+    parser.add_argument("--no-fast-path", action="store_true", help="send every extraction to the LLM")
+    parser.add_argument("--no-page-selection", action="store_true", help="send every page to the LLM")
+    parser.add_argument("--corpus-dir", help="reuse a corpus written by an earlier run")
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.child:
+        print(json.dumps(run_scenario_in_process(scenarios[0], args)))
+        return
+
+    if args.corpus_dir:
+        args.corpus_dir = os.path.abspath(args.corpus_dir)
+    else:
+        args.corpus_dir = tempfile.mkdtemp(prefix="benchmark-corpus-")
+        corpus = generate_corpus(
+            args.corpus_dir,
+            [int(count) for count in args.page_counts.split(",")],
+            [kind for kind in args.kinds.split(",") if kind],
+            seed=args.seed
+        )
+        with open(os.path.join(args.corpus_dir, "corpus.json"), "w") as f:
+            json.dump(corpus, f, indent=2)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {key: value for key, value in vars(args).items() if key != 'child'}
+        },
+        'scenarios': {scenario: run_scenario_isolated(scenario, args) for scenario in scenarios}
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+// Read a server-sent-events stream with fetch, since EventSource cannot send
+// the Authorization header. Calls onEvent(event, data) for every event and
+// resolves when the server closes the stream.
+const streamEvents = async (url, { token, method = 'GET', onEvent, signal }) => {
+  const response = await fetch(url, {
+    method,
+    headers: {
+      Accept: 'text/event-stream',
+      Authorization: `Bearer ${token}`
+    },
+    signal
+  });
+
+  if (!response.ok) {
+    throw new Error(`Event stream failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      let event = 'message';
+      const dataLines = [];
+      for (const line of frame.split('\n')) {
+        if (line.startsWith('event:')) {
+          event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+          dataLines.push(line.slice(5).trim());
+        }
+      }
+      // Frames without data are keep-alive comments
+      if (dataLines.length > 0) {
+        onEvent(event, JSON.parse(dataLines.join('\n')));
+      }
+    }
+  }
+};
+
+export default streamEvents;